@@ -2,16 +2,32 @@
 Employee Analytics Platform - FastAPI Application
 Main application entry point
 """
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-from database import init_db, engine
-from models import Employee, Department, EmployeeAuditLog, PerformanceData
+from database import init_db, engine, SessionLocal, shard_router
+from services.department_registry import department_registry
+from services.csv_pipeline import start_executor, shutdown_executor
+from services import sharding
+from services.scheduler import SCHEDULER_ENABLED
+from services.jobs import scheduler, register_jobs
+from services import prepared_statements, query_profiler
+from services.query_profiler import QueryProfilingMiddleware, PROFILE_RESPONSE_HEADERS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Prepare hot queries on every pooled connection as it is opened, and attach
+# the cursor listeners for opt-in per-request query profiling (on every shard)
+for bind in [engine, *shard_router.engines.values()]:
+    prepared_statements.install(bind)
+    query_profiler.install(bind)
+
 # Create FastAPI app
 app = FastAPI(
     title="Employee Analytics Platform",
@@ -26,8 +42,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=PROFILE_RESPONSE_HEADERS,
 )
 
+# Query counts, DB time and N+1 detection per request (QUERY_PROFILING / X-Profile-Queries)
+app.add_middleware(QueryProfilingMiddleware)
+
+
+def _replicate_departments():
+    db = SessionLocal()
+    try:
+        sharding.replicate_departments(db)
+    finally:
+        db.close()
+
+
 # Initialize database tables
 @app.on_event("startup")
 async def startup_event():
@@ -36,14 +65,47 @@ async def startup_event():
     init_db()
     logger.info("Database initialized successfully")
 
+    # Upload validation workers, started before the background threads below
+    start_executor()
+
+    db = SessionLocal()
+    try:
+        department_registry.load(db)
+        sharding.replicate_departments(db)
+    finally:
+        db.close()
+    # Keep the shards' copies of departments current, including changes made
+    # by other workers or directly in the database
+    if shard_router.sharded:
+        department_registry.on_change(_replicate_departments)
+    department_registry.start_listener(engine)
+
+    if SCHEDULER_ENABLED:
+        register_jobs()
+        scheduler.start()
+
+    logger.info(f"Ready to serve requests {(time.perf_counter() - _import_started) * 1000:.0f} ms after import")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release background resources on shutdown"""
+    scheduler.stop()
+    department_registry.stop_listener()
+    shutdown_executor()
+    sharding.shutdown_executor()
+
 
 # Include routers
-from routes import employees, analytics, departments, csv_upload
+from routes import employees, analytics, departments, csv_upload, exports, admin, audit
 
 app.include_router(employees.router)
 app.include_router(analytics.router)
 app.include_router(departments.router)
 app.include_router(csv_upload.router)
+app.include_router(exports.router)
+app.include_router(admin.router)
+app.include_router(audit.router)
 
 
 @app.get("/")
@@ -57,7 +119,10 @@ async def root():
             "employees": "/employees",
             "analytics": "/analytics",
             "departments": "/departments",
-            "upload": "/upload"
+            "upload": "/upload",
+            "export": "/export",
+            "admin": "/admin",
+            "audit": "/audit"
         }
     }
 
@@ -0,0 +1,85 @@
+"""
+Benchmark CSV parsing and validation throughput by worker count
+Usage: python -m benchmarks.bench_csv_workers --rows 500000 --workers 1 2 4 8
+
+Runs the upload pipeline (services.csv_pipeline) on a generated CSV without
+touching the database, so the numbers isolate parsing and validation.
+"""
+from services import csv_pipeline
+import argparse
+import io
+import os
+import random
+import time
+
+STATUSES = ["active", "resigned"]
+
+
+def generate_csv(rows: int, departments: int, error_rate: float) -> bytes:
+    """Build an in-memory CSV of random employees, some of them invalid"""
+    rng = random.Random(42)
+    lines = ["first_name,last_name,email,salary,department_id,date_joined,status"]
+    for index in range(rows):
+        email = f"user{index}@example.com" if rng.random() >= error_rate else f"user{index}-at-example"
+        lines.append(
+            f"first{index},\"last, {index}\",{email},{rng.uniform(30000, 200000):.2f},"
+            f"{rng.randint(1, departments)},2020-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d},"
+            f"{rng.choice(STATUSES)}"
+        )
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def run(data: bytes, workers: int, chunk_size: int, department_ids: frozenset) -> tuple:
+    # The pool is sized from CSV_WORKERS when first created, so rebuild it per run
+    csv_pipeline.shutdown_executor()
+    csv_pipeline.CSV_WORKERS = workers
+    if workers > 1:
+        # Start the worker processes outside the timed section
+        csv_pipeline._get_executor().submit(int).result()
+
+    started = time.perf_counter()
+    valid = errors = 0
+    tasks = csv_pipeline.iter_csv_tasks(io.BytesIO(data), chunk_size)
+    for batch_valid, batch_errors in csv_pipeline.iter_validated_batches(tasks, department_ids, workers=workers):
+        valid += len(batch_valid)
+        errors += len(batch_errors)
+    return time.perf_counter() - started, valid, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV validation throughput by worker count")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Worker counts to compare (default: powers of two up to the CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=csv_pipeline.CHUNK_SIZE)
+    parser.add_argument("--departments", type=int, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count; the best is reported")
+    args = parser.parse_args()
+
+    worker_counts = args.workers
+    if not worker_counts:
+        cpus = os.cpu_count() or 1
+        worker_counts = [count for count in (1, 2, 4, 8, 16, 32, 64) if count <= cpus]
+
+    data = generate_csv(args.rows, args.departments, args.error_rate)
+    department_ids = frozenset(range(1, args.departments + 1))
+    print(f"{args.rows} rows, {len(data) / 1024 / 1024:.1f} MiB, chunk size {args.chunk_size // 1024} KiB")
+    print(f"{'workers':>8} {'seconds':>9} {'rows/s':>11} {'speedup':>8}")
+
+    baseline = None
+    try:
+        for workers in worker_counts:
+            elapsed, valid, errors = min(
+                (run(data, workers, args.chunk_size, department_ids) for _ in range(args.repeat)),
+                key=lambda result: result[0]
+            )
+            assert valid + errors == args.rows, f"expected {args.rows} rows, got {valid + errors}"
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {args.rows / elapsed:>11,.0f} {baseline / elapsed:>7.2f}x")
+    finally:
+        csv_pipeline.shutdown_executor()
+
+
+if __name__ == "__main__":
+    main()
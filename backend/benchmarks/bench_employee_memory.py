@@ -0,0 +1,121 @@
+"""
+Benchmark memory of employee read results and upload error reports
+Usage: python -m benchmarks.bench_employee_memory --rows 100000
+
+1. Employees loaded as ORM instances vs EmployeeRecord tuples (with interned
+   status), read from an in-memory SQLite copy of the employees table.
+2. Upload error reports with and without interning department_id/status,
+   for a generated CSV validated by the worker pool.
+Memory is the growth measured by tracemalloc while the result is held.
+"""
+from benchmarks.bench_csv_workers import generate_csv
+from database import Base
+from models.department import Department
+from models.employee import Employee
+from models.employee_record import EmployeeRecord
+from services import csv_pipeline
+from services.employee_service import EMPLOYEE_COLUMNS
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from datetime import date
+import argparse
+import gc
+import io
+import random
+import tracemalloc
+
+
+def measure(build) -> tuple:
+    """(result, bytes still allocated while the result is held)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def employee_database(rows: int, departments: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Department.__table__, Employee.__table__])
+    rng = random.Random(42)
+    with engine.begin() as connection:
+        connection.execute(Department.__table__.insert(), [
+            {"department_id": index, "department_name": f"Department {index}", "location": "Remote"}
+            for index in range(1, departments + 1)
+        ])
+        connection.execute(Employee.__table__.insert(), [
+            {
+                "first_name": f"First{index}",
+                "last_name": f"Last{index}",
+                "email": f"user{index}@example.com",
+                "salary": round(rng.uniform(30000, 200000), 2),
+                "department_id": rng.randint(1, departments),
+                "date_joined": date(2015 + index % 10, 1 + index % 12, 1 + index % 28),
+                "status": "active" if rng.random() < 0.9 else "resigned"
+            }
+            for index in range(rows)
+        ])
+    return sessionmaker(bind=engine)
+
+
+def validate_errors(data: bytes, department_ids: frozenset) -> list:
+    errors = []
+    tasks = csv_pipeline.iter_csv_tasks(io.BytesIO(data), 256 * 1024)
+    for _, batch_errors in csv_pipeline.iter_validated_batches(tasks, department_ids):
+        errors.extend(batch_errors)
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory of employee records and error reports")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--departments", type=int, default=20)
+    args = parser.parse_args()
+
+    session_factory = employee_database(args.rows, args.departments)
+
+    db = session_factory()
+    orm, orm_bytes = measure(lambda: db.query(Employee).all())
+    del orm
+    db.close()
+
+    db = session_factory()
+    records, record_bytes = measure(lambda: [
+        EmployeeRecord.from_row(row) for row in db.execute(select(*EMPLOYEE_COLUMNS))
+    ])
+    distinct_status = len({id(record.status) for record in records})
+    del records
+    db.close()
+
+    print(f"Employee list, {args.rows} rows")
+    print(f"  ORM instances      {orm_bytes / 1024 / 1024:>8.1f} MiB  {orm_bytes / args.rows:>6.0f} B/row")
+    print(f"  EmployeeRecord     {record_bytes / 1024 / 1024:>8.1f} MiB  {record_bytes / args.rows:>6.0f} B/row"
+          f"  ({orm_bytes / record_bytes:.1f}x smaller, {distinct_status} status objects)")
+
+    # Department IDs above the valid range make about half the rows fail with their data kept
+    data = generate_csv(args.rows, args.departments * 2, 0.0)
+    department_ids = frozenset(range(1, args.departments + 1))
+    try:
+        csv_pipeline._get_executor()
+        results = {}
+        print("Error report")
+        for label, fields in (("not interned", ()), ("interned", csv_pipeline.INTERNED_FIELDS)):
+            interned_fields, csv_pipeline.INTERNED_FIELDS = csv_pipeline.INTERNED_FIELDS, fields
+            try:
+                errors, size = measure(lambda: validate_errors(data, department_ids))
+            finally:
+                csv_pipeline.INTERNED_FIELDS = interned_fields
+            distinct = len({id(error["data"]["status"]) for error in errors})
+            results[label] = size
+            print(f"  {label:<18} {size / 1024 / 1024:>8.1f} MiB  {len(errors)} errors, {distinct} status objects")
+            del errors
+        saved = results["not interned"] - results["interned"]
+        print(f"  interning saves {saved / 1024 / 1024:.1f} MiB ({saved / results['not interned']:.0%})")
+    finally:
+        csv_pipeline.shutdown_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark prepared statements against the same queries sent ad hoc
+Usage: python -m benchmarks.bench_prepared_statements --iterations 2000
+
+Runs against DATABASE_URL (which needs data, e.g. from init_data.py). For
+each lookup-style statement, EXECUTE of the statement prepared by
+services.prepared_statements is timed against the plain query on one
+connection, with the same parameter values in the same order.
+"""
+from database import engine, SessionLocal
+from services import prepared_statements
+from services.analytics_service import DEPARTMENT_STATS, SALARY_GROWTH, AUDIT_SUMMARY
+from services.audit_service import SALARY_TIMELINE
+from services.employee_service import EMPLOYEE_BY_ID
+from sqlalchemy import text
+import argparse
+import random
+import statistics
+import time
+
+
+def time_statement(db, sql, parameter_sets: list) -> list:
+    """Per-execution latencies in microseconds, rows fully fetched"""
+    latencies = []
+    for params in parameter_sets:
+        started = time.perf_counter()
+        db.execute(sql, params).all()
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prepared vs ad-hoc statements")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3, help="Alternating rounds; the best median is reported")
+    args = parser.parse_args()
+
+    prepared_statements.install(engine)
+    db = SessionLocal()
+    try:
+        employee_ids = list(db.execute(text("SELECT employee_id FROM employees LIMIT 10000")).scalars())
+        department_ids = list(db.execute(text("SELECT department_id FROM departments")).scalars())
+        if not employee_ids or not department_ids:
+            raise SystemExit("The benchmark needs employees and departments; run init_data.py first")
+
+        rng = random.Random(42)
+        cases = [
+            (EMPLOYEE_BY_ID, lambda: {"employee_id": rng.choice(employee_ids)}),
+            (DEPARTMENT_STATS, lambda: {"dept_id": rng.choice(department_ids)}),
+            (SALARY_GROWTH, lambda: {"emp_id": rng.choice(employee_ids), "months_back": 12}),
+            (AUDIT_SUMMARY, lambda: {"days": 30}),
+            (SALARY_TIMELINE, lambda: {"emp_id": rng.choice(employee_ids), "since": None, "until": None})
+        ]
+
+        prepared = db.connection().info.get("prepared_statements", set())
+        print(f"{args.iterations} executions per statement, best of {args.rounds} rounds (median / p95 in µs)")
+        print(f"{'statement':<28} {'ad hoc':>16} {'prepared':>16} {'speedup':>8}")
+        for statement, make_params in cases:
+            if statement.name not in prepared:
+                print(f"{statement.name:<28} not prepared on this connection, skipped")
+                continue
+            parameter_sets = [make_params() for _ in range(args.iterations)]
+            # Warm both paths (plan caches, buffers) before timing
+            time_statement(db, statement.fallback_sql, parameter_sets[:50])
+            time_statement(db, statement.execute_sql, parameter_sets[:50])
+
+            results = {"ad hoc": [], "prepared": []}
+            for _ in range(args.rounds):
+                results["ad hoc"].append(sorted(time_statement(db, statement.fallback_sql, parameter_sets)))
+                results["prepared"].append(sorted(time_statement(db, statement.execute_sql, parameter_sets)))
+            adhoc = min(results["ad hoc"], key=statistics.median)
+            execute = min(results["prepared"], key=statistics.median)
+            p95 = int(args.iterations * 0.95)
+            print(
+                f"{statement.name:<28} {statistics.median(adhoc):>7.0f} / {adhoc[p95]:>6.0f} "
+                f"{statistics.median(execute):>7.0f} / {execute[p95]:>6.0f} "
+                f"{statistics.median(adhoc) / statistics.median(execute):>7.2f}x"
+            )
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark cold start: time from launching the server to its first served requests
+Usage: python -m benchmarks.bench_startup --server gunicorn --workers 4 --repeat 5
+
+Each run starts a fresh server process on --port and measures how long it
+takes until /health answers (startup finished, including interpreter and
+gunicorn boot) and until the first database-backed request succeeds. The
+runs are made with the schema current and then with it marked out of date,
+which makes init_db re-apply the SQL files. Needs DATABASE_URL pointing at a database
+the benchmark may modify: the out-of-date runs delete the schema_version
+rows, and the server records the current version again on startup.
+"""
+from sqlalchemy import text
+import argparse
+import http.client
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+from database import engine, SCHEMA_VERSION, get_schema_version
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def server_command(server: str, port: int, workers: int) -> list:
+    if server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-w", str(workers),
+                "-b", f"127.0.0.1:{port}", "app:app"]
+    return [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers)]
+
+
+def wait_for(port: int, path: str, deadline: float) -> bool:
+    """Poll path until it answers 200; False if the deadline passes first"""
+    while time.perf_counter() < deadline:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        try:
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                return True
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            connection.close()
+        time.sleep(0.01)
+    return False
+
+
+def mark_schema_outdated() -> None:
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM schema_version"))
+
+
+def run(args, outdated: bool) -> tuple:
+    """Start one server; returns (seconds until /health, seconds until the first query)"""
+    if outdated:
+        mark_schema_outdated()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        server_command(args.server, args.port, args.workers), cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+    try:
+        deadline = started + args.timeout
+        if not wait_for(args.port, "/health", deadline):
+            raise RuntimeError(f"Server did not answer /health within {args.timeout:.0f}s")
+        ready = time.perf_counter() - started
+        if not wait_for(args.port, args.path, deadline):
+            raise RuntimeError(f"Server did not answer {args.path} within {args.timeout:.0f}s")
+        return ready, time.perf_counter() - started
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark time to first request after a cold start")
+    parser.add_argument("--server", choices=["uvicorn", "gunicorn"], default="gunicorn")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per schema state")
+    parser.add_argument("--path", default="/departments/", help="Database-backed request timed after /health")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for one server")
+    args = parser.parse_args()
+
+    # Start once so the schema is current before timing
+    run(args, outdated=False)
+    if get_schema_version() < SCHEMA_VERSION:
+        raise RuntimeError("The server did not bring the schema to the current version")
+
+    print(f"{args.server}, {args.workers} worker(s), {args.repeat} runs each")
+    print(f"{'schema':>10} {'health s':>9} {'first query s':>14} {'worst health s':>15}")
+    for label, outdated in (("current", False), ("outdated", True)):
+        results = [run(args, outdated) for _ in range(args.repeat)]
+        health = [ready for ready, _ in results]
+        first_query = [query for _, query in results]
+        print(
+            f"{label:>10} {statistics.median(health):>9.2f} {statistics.median(first_query):>14.2f} "
+            f"{max(health):>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
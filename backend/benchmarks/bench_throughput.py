@@ -0,0 +1,95 @@
+"""
+Benchmark API throughput and latency against a running server
+Usage: python -m benchmarks.bench_throughput --url http://localhost:8000 --concurrency 32 --duration 30
+
+Compare server setups (uvicorn --reload vs gunicorn.conf.py, different
+WEB_CONCURRENCY or pool sizes) by running this against each with the same
+arguments. Only the standard library is used; each client thread keeps one
+HTTP/1.1 keep-alive connection.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import argparse
+import http.client
+import itertools
+import statistics
+import time
+
+DEFAULT_PATHS = [
+    "/employees/?limit=50",
+    "/employees/stats/count",
+    "/departments/",
+    "/analytics/top_departments",
+    "/analytics/salary_insights"
+]
+
+
+def client(url: str, paths: list, deadline: float, offset: int) -> tuple:
+    """Request paths round-robin until the deadline; returns (latencies in ms, errors)"""
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    connection = connection_class(parts.hostname, parts.port, timeout=30)
+    latencies = []
+    errors = 0
+    for path in itertools.islice(itertools.cycle(paths), offset, None):
+        if time.perf_counter() >= deadline:
+            break
+        started = time.perf_counter()
+        try:
+            connection.request("GET", parts.path.rstrip("/") + path)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    return latencies, errors
+
+
+def percentile(values: list, q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API throughput against a running server")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="Concurrent clients; several values run one after another")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=3, help="Seconds of untimed requests first")
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="Path to request (repeatable; default: a mix of read endpoints)")
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    client(args.url, paths, time.perf_counter() + args.warmup, 0)
+
+    print(f"{args.url}, {len(paths)} paths, {args.duration:.0f}s per level")
+    print(f"{'clients':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for concurrency in args.concurrency:
+        deadline = time.perf_counter() + args.duration
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(
+                lambda offset: client(args.url, paths, deadline, offset), range(concurrency)
+            ))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(itertools.chain.from_iterable(latency for latency, _ in results))
+        errors = sum(error for _, error in results)
+        if not latencies:
+            print(f"{concurrency:>8} {'-':>9} {'-':>8} {'-':>8} {'-':>8} {errors:>7}")
+            continue
+        print(
+            f"{concurrency:>8} {len(latencies) / elapsed:>9,.0f} {statistics.median(latencies):>8.1f} "
+            f"{percentile(latencies, 0.95):>8.1f} {percentile(latencies, 0.99):>8.1f} {errors:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
 """
 Database connection and session management for Employee Analytics Platform
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import logging
 import os
-from typing import Generator
+from typing import Generator, Dict, List, Optional, Tuple
+import re
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
 
 # Database URL from environment variable or default
 DATABASE_URL = os.getenv(
@@ -13,12 +19,36 @@ DATABASE_URL = os.getenv(
     "postgresql://postgres:admin123@db:5432/employee_analytics"
 )
 
+# Schema revision produced by the files in sql/ (see sql/05_schema_version.sql)
+SCHEMA_VERSION = 8
+
+# Directory holding the SQL files and sql/migrations, used to upgrade older databases
+SQL_DIR = os.getenv("SQL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sql"))
+
+# Idempotent definition files: tables first, then (after any migrations)
+# indexes, functions, triggers and the version record
+SCHEMA_FILES = ["01_schema.sql"]
+DEFINITION_FILES = ["02_indexes.sql", "03_stored_functions.sql", "04_triggers.sql", "05_schema_version.sql"]
+
+# Serializes schema upgrades across workers and replicas
+SCHEMA_LOCK_KEY = zlib.crc32(b"schema_upgrade")
+
+# Serializes changes to the recorded shard layout
+SHARD_LAYOUT_LOCK_KEY = zlib.crc32(b"shard_layout")
+
+# (sequence, table, column) interleaved across shards so IDs stay unique
+SHARDED_SEQUENCES = [
+    ("employees_employee_id_seq", "employees", "employee_id"),
+    ("employee_audit_log_log_id_seq", "employee_audit_log", "log_id")
+]
+
 # Create SQLAlchemy engine
+# Pool sizes are per process; gunicorn.conf.py sizes them per worker
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=int(os.getenv("DB_POOL_SIZE", 10)),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 20))
 )
 
 # Create SessionLocal class
@@ -28,6 +58,212 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def _parse_pairs(value: str) -> Dict[str, str]:
+    """Parse "key=value,key=value" environment settings"""
+    pairs = {}
+    for item in value.split(","):
+        if item.strip():
+            key, separator, setting = item.partition("=")
+            if not separator:
+                raise ValueError(f"Expected key=value, got {item!r}")
+            pairs[key.strip()] = setting.strip()
+    return pairs
+
+
+class ShardRouter:
+    """
+    Engines for the databases holding employees, keyed by shard name.
+
+    Every department lives entirely on one shard, so per-department queries
+    go to a single database and company-wide aggregates fan out to all of
+    them (see services.sharding). An existing department is placed the
+    first time it is routed: on its shard from the department map if
+    listed, otherwise on department_id modulo the number of shards. The
+    placement is stored in the main database and kept from then on, so
+    adding shards never re-homes existing departments. Without SHARD_DATABASE_URLS there is one shard,
+    "default", using the main engine, and nothing is routed or stored.
+
+    The main database keeps departments, the shard layout and placements and
+    the scheduled job runs. The departments table is copied to every shard
+    for the foreign key, and each shard writes the daily snapshots of its own
+    employees.
+    """
+
+    def __init__(self, urls: Dict[str, str], department_map: Dict[int, str]):
+        self.engines: Dict[str, object] = {}
+        self.sessions: Dict[str, sessionmaker] = {}
+        for name, url in (urls or {"default": DATABASE_URL}).items():
+            shard_engine = engine if url == DATABASE_URL else create_engine(
+                url,
+                pool_pre_ping=True,
+                pool_size=int(os.getenv("SHARD_POOL_SIZE", 5)),
+                max_overflow=int(os.getenv("SHARD_MAX_OVERFLOW", 10))
+            )
+            self.engines[name] = shard_engine
+            self.sessions[name] = sessionmaker(autocommit=False, autoflush=False, bind=shard_engine)
+        self.names: List[str] = list(self.engines)
+
+        unknown = set(department_map.values()) - set(self.names)
+        if unknown:
+            raise ValueError(f"DEPARTMENT_SHARD_MAP refers to unknown shards: {', '.join(sorted(unknown))}")
+        self.department_map = department_map
+        # department_id -> shard, as stored in department_shards
+        self.placements: Dict[int, str] = {}
+        self._placement_lock = threading.Lock()
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.names) > 1
+
+    def _initial_shard(self, department_id: int) -> str:
+        if department_id in self.department_map:
+            return self.department_map[department_id]
+        return self.names[department_id % len(self.names)]
+
+    def shard_for_department(self, department_id: int) -> str:
+        """
+        Name of the shard holding a department's employees. A department
+        that does not exist has no rows on any shard, so it is answered by
+        the first shard and nothing is recorded for it.
+        """
+        if not self.sharded:
+            return self.names[0]
+        shard = self.placements.get(department_id)
+        if shard is None:
+            shard = self._place(department_id)
+        return shard or self.names[0]
+
+    def _place(self, department_id: int) -> Optional[str]:
+        """
+        Record the placement of an existing department (the first worker to
+        place it wins) and return it; None if the department does not exist
+        """
+        with engine.begin() as connection:
+            shard = connection.execute(
+                text("""
+                    WITH placed AS (
+                        INSERT INTO department_shards (department_id, shard)
+                        SELECT :department_id, :shard
+                        WHERE EXISTS (SELECT 1 FROM departments WHERE department_id = :department_id)
+                        ON CONFLICT (department_id) DO NOTHING
+                        RETURNING shard
+                    )
+                    SELECT shard FROM placed
+                    UNION ALL
+                    SELECT shard FROM department_shards WHERE department_id = :department_id
+                    LIMIT 1
+                """),
+                {"department_id": department_id, "shard": self._initial_shard(department_id)}
+            ).scalar()
+        if shard is not None:
+            with self._placement_lock:
+                self.placements[department_id] = shard
+        return shard
+
+    def session(self, shard: str):
+        """Open a new session on a shard; the caller closes it"""
+        return self.sessions[shard]()
+
+    def sync_layout(self) -> None:
+        """
+        Check the configured shards against the layout recorded in the main
+        database and load the department placements.
+
+        On first start, and when shards have been added, the layout is
+        recorded, departments without a placement are placed with the rule
+        they were routed by so far, and the ID sequences are re-interleaved.
+        Removing or renaming a shard, or pinning an already placed department
+        elsewhere in DEPARTMENT_SHARD_MAP, stops startup: the rows would have
+        to be moved first. Starting with an unchanged layout costs two queries.
+        """
+        with engine.begin() as connection:
+            recorded = connection.execute(text("SELECT shard FROM shard_layout ORDER BY position")).scalars().all()
+            if recorded != self.names:
+                connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SHARD_LAYOUT_LOCK_KEY})
+                recorded = connection.execute(text("SELECT shard FROM shard_layout ORDER BY position")).scalars().all()
+            if recorded != self.names:
+                removed = set(recorded) - set(self.names)
+                if removed:
+                    raise RuntimeError(
+                        f"Shards {', '.join(sorted(removed))} are recorded in shard_layout but missing from "
+                        f"SHARD_DATABASE_URLS; move their departments and update department_shards and "
+                        f"shard_layout before removing or renaming a shard"
+                    )
+                if recorded:
+                    logger.warning(f"Shard layout changed from {recorded} to {self.names}")
+                else:
+                    # Departments created before placements were recorded keep the shard they were routed to
+                    existing = [
+                        {"department_id": department_id, "shard": self._initial_shard(department_id)}
+                        for department_id in connection.execute(text("SELECT department_id FROM departments")).scalars()
+                    ]
+                    if existing:
+                        connection.execute(
+                            text("""
+                                INSERT INTO department_shards (department_id, shard) VALUES (:department_id, :shard)
+                                ON CONFLICT (department_id) DO NOTHING
+                            """),
+                            existing
+                        )
+                connection.execute(text("DELETE FROM shard_layout"))
+                connection.execute(
+                    text("INSERT INTO shard_layout (position, shard) VALUES (:position, :shard)"),
+                    [{"position": position, "shard": name} for position, name in enumerate(self.names)]
+                )
+                self.configure_sequences()
+
+            placements = dict(connection.execute(text("SELECT department_id, shard FROM department_shards")).all())
+
+        conflicts = [
+            f"{department_id}={shard} (placed on {placements[department_id]})"
+            for department_id, shard in self.department_map.items()
+            if department_id in placements and placements[department_id] != shard
+        ]
+        if conflicts:
+            raise RuntimeError(
+                f"DEPARTMENT_SHARD_MAP moves departments that are already placed: {', '.join(conflicts)}; "
+                f"move their rows and update department_shards first"
+            )
+        with self._placement_lock:
+            self.placements = placements
+        logger.info(f"Loaded {len(placements)} department placements over {len(self.names)} shards")
+
+    def configure_sequences(self) -> None:
+        """
+        Interleave the ID sequences of employees and their audit log so IDs
+        stay unique across shards: shard i of n only generates IDs congruent
+        to i + 1 modulo n, above the highest ID on any shard. Called by
+        sync_layout when the shard layout changes; new rows should be held
+        back meanwhile, since IDs handed out under the old step are not seen.
+        """
+        count = len(self.names)
+        for sequence, table, column in SHARDED_SEQUENCES:
+            highest = 0
+            for name in self.names:
+                with self.engines[name].connect() as connection:
+                    highest = max(highest, connection.execute(text(f"""
+                        SELECT GREATEST(
+                            (SELECT last_value FROM {sequence}),
+                            (SELECT COALESCE(MAX({column}), 0) FROM {table})
+                        )
+                    """)).scalar())
+            for index, name in enumerate(self.names):
+                next_id = highest + 1 + (index - highest) % count
+                with self.engines[name].begin() as connection:
+                    connection.execute(text(f"ALTER SEQUENCE {sequence} INCREMENT BY {count}"))
+                    connection.execute(
+                        text("SELECT setval(:sequence, :next_id, false)"),
+                        {"sequence": sequence, "next_id": next_id}
+                    )
+                logger.info(f"Shard {name}: {column} continues at {next_id} in steps of {count}")
+
+
+shard_router = ShardRouter(
+    _parse_pairs(os.getenv("SHARD_DATABASE_URLS", "")),
+    {int(department_id): shard for department_id, shard in _parse_pairs(os.getenv("DEPARTMENT_SHARD_MAP", "")).items()}
+)
+
+
 def get_db() -> Generator:
     """
     Dependency function to get database session.
@@ -40,12 +276,97 @@ def get_db() -> Generator:
         db.close()
 
 
-def init_db():
+def _stored_version(connection) -> int:
+    exists = connection.execute(text("SELECT to_regclass('schema_version') IS NOT NULL")).scalar()
+    if not exists:
+        return 0
+    return connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def get_schema_version(bind=None) -> int:
+    """
+    Return the schema version recorded in the database (the main one unless
+    bind is given), or 0 if the schema_version table does not exist yet.
+    """
+    with (bind or engine).connect() as connection:
+        return _stored_version(connection)
+
+
+def _migrations() -> List[Tuple[int, str]]:
+    """Numbered migration files (sql/migrations/NNN_name.sql) in version order"""
+    directory = os.path.join(SQL_DIR, "migrations")
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for name in os.listdir(directory):
+        match = re.match(r"(\d+)_\w+\.sql$", name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(found)
+
+
+def _run_sql_file(connection, path: str) -> None:
+    with open(path, "r") as f:
+        # Sent as one script, so plpgsql bodies and % signs are passed through untouched
+        connection.execution_options(no_parameters=True).exec_driver_sql(f.read())
+
+
+def upgrade_schema(bind, force: bool = False) -> int:
+    """
+    Bring a database to SCHEMA_VERSION in one transaction and return the
+    version it had before.
+
+    Tables missing from sql/01_schema.sql are created, then every migration in
+    sql/migrations numbered above the stored version runs (changes to existing
+    tables, which the definition files cannot express), and finally the
+    idempotent index, function and trigger files are re-applied and the
+    version is recorded. An advisory lock makes concurrent workers wait for
+    the first one and then find the schema current.
+    """
+    with bind.begin() as connection:
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        version = _stored_version(connection)
+        if version >= SCHEMA_VERSION and not force:
+            return version
+
+        missing = [name for name in SCHEMA_FILES + DEFINITION_FILES if not os.path.isfile(os.path.join(SQL_DIR, name))]
+        if missing:
+            raise RuntimeError(
+                f"Database {bind.url.database} is at schema version {version}, this build needs "
+                f"{SCHEMA_VERSION}, and the SQL files to upgrade it were not found in {SQL_DIR} "
+                f"(missing {', '.join(missing)}); set SQL_DIR or apply sql/migrations manually"
+            )
+
+        for name in SCHEMA_FILES:
+            _run_sql_file(connection, os.path.join(SQL_DIR, name))
+        for number, path in _migrations():
+            if number > version:
+                logger.info(f"Applying migration {os.path.basename(path)} to {bind.url.database}")
+                _run_sql_file(connection, path)
+        for name in DEFINITION_FILES:
+            _run_sql_file(connection, os.path.join(SQL_DIR, name))
+
+        logger.info(f"Database schema of {bind.url.database} upgraded from version {version} to {SCHEMA_VERSION}")
+        return version
+
+
+def init_db(force: bool = False):
     """
-    Initialize database by creating all tables.
-    Call this after importing all models.
+    Bring the main database and every shard to SCHEMA_VERSION (see
+    upgrade_schema). Databases already at the current version are only asked
+    for their version, so starting a worker costs one query per database.
+    force re-applies the SQL definition files regardless of the version.
+    With shards, the shard layout is then checked (see ShardRouter.sync_layout).
     """
-    Base.metadata.create_all(bind=engine)
+    engines = [engine] + [shard_engine for shard_engine in shard_router.engines.values() if shard_engine is not engine]
+    for bind in engines:
+        if not force and get_schema_version(bind) >= SCHEMA_VERSION:
+            logger.info(f"Database schema of {bind.url.database} is at version {SCHEMA_VERSION}")
+            continue
+        upgrade_schema(bind, force)
+
+    if shard_router.sharded:
+        shard_router.sync_layout()
 
 
 def execute_sql_file(file_path: str, db):
@@ -0,0 +1,62 @@
+"""
+Script to export tables to Parquet or Arrow IPC files for BI tools
+Usage: python export_data.py employees employees.parquet --department-id 1 --status active
+"""
+from database import SessionLocal
+from services.export_service import ExportService, EXPORT_TABLES, EXPORT_FORMATS
+from datetime import datetime
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+
+def main():
+    """Parse arguments and write the export file"""
+    parser = argparse.ArgumentParser(description="Export employee analytics tables")
+    parser.add_argument("table", choices=list(EXPORT_TABLES))
+    parser.add_argument("output", help="Output file path")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=None,
+                        help="Output format (default: inferred from the file extension, else parquet)")
+    parser.add_argument("--department-id", type=int, default=None)
+    parser.add_argument("--status", choices=["active", "resigned"], default=None)
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="Start of time range (inclusive), ISO format")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None,
+                        help="End of time range (exclusive), ISO format")
+    parser.add_argument("--batch-rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    export_format = args.format
+    if export_format is None:
+        export_format = "arrow" if args.output.endswith((".arrow", ".arrows", ".ipc")) else "parquet"
+
+    # Write next to the destination and rename on success, so a failed export
+    # never leaves a truncated file under the requested name
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    fd, temp_path = tempfile.mkstemp(prefix=".export-", suffix=".tmp", dir=output_dir)
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        with os.fdopen(fd, "wb") as sink:
+            rows = ExportService.write(
+                db, sink, args.table, export_format, args.batch_rows,
+                department_id=args.department_id, status=args.status,
+                since=args.since, until=args.until
+            )
+        os.replace(temp_path, args.output)
+        print(f"✅ Exported {rows} rows from {args.table} to {args.output} "
+              f"in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        print(f"❌ Error exporting data: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
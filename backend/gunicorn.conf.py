@@ -0,0 +1,100 @@
+"""
+Gunicorn configuration for running the API in production
+Usage: gunicorn -c gunicorn.conf.py app:app
+"""
+from collections import Counter
+from sqlalchemy.engine import make_url
+import logging
+import multiprocessing
+import os
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# One uvicorn worker per core; uvicorn[standard] selects uvloop and httptools
+workers = int(os.getenv("WEB_CONCURRENCY", cpu_count))
+worker_class = "uvicorn.workers.UvicornWorker"
+keepalive = int(os.getenv("KEEPALIVE", 5))
+
+# Workers get this long after SIGTERM to finish in-flight requests (including
+# long CSV imports) before they are killed
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 300))
+timeout = int(os.getenv("WORKER_TIMEOUT", 300))
+
+# Recycle workers periodically to bound memory growth, staggered by jitter
+max_requests = int(os.getenv("MAX_REQUESTS", 10000))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", 1000))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+# Split the PostgreSQL connection budget across workers. Per worker, each
+# server holds:
+#   main database: the engine pool, which must also cover the scheduler (an
+#     advisory lock connection plus a session per running job), and one
+#     dedicated LISTEN connection for the department registry
+#   every shard engine on that server: its own pool (SHARD_POOL_SIZE + overflow)
+# Shards on other servers get the same per-worker split of their own budget.
+db_max_connections = int(os.getenv("DB_MAX_CONNECTIONS", 100))
+db_reserved_connections = int(os.getenv("DB_RESERVED_CONNECTIONS", 10))
+scheduler_enabled = os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+scheduler_connections = 2 * int(os.getenv("SCHEDULER_WORKERS", 2)) if scheduler_enabled else 0
+
+# Smallest usable pools: a couple of concurrent requests, plus the scheduler
+MIN_MAIN_CONNECTIONS = 2 + scheduler_connections
+MIN_SHARD_CONNECTIONS = 2
+
+
+def _server(url: str) -> tuple:
+    parsed = make_url(url)
+    return parsed.host, parsed.port or 5432
+
+
+def _split(connections: int) -> tuple:
+    """(pool_size, max_overflow) for an engine allowed this many connections"""
+    overflow = connections // 3
+    return connections - overflow, overflow
+
+
+database_url = os.getenv("DATABASE_URL", "postgresql://postgres:admin123@db:5432/employee_analytics")
+shard_urls = [
+    url.partition("=")[2].strip()
+    for url in os.getenv("SHARD_DATABASE_URLS", "").split(",") if url.strip()
+]
+# The main database listed as a shard reuses the main engine
+shard_urls = [url for url in shard_urls if url != database_url]
+
+engines_per_server = Counter(_server(url) for url in shard_urls)
+main_server = _server(database_url)
+per_worker = (db_max_connections - db_reserved_connections) // workers
+
+main_share = (per_worker - 1) // (1 + engines_per_server[main_server])
+main_connections = max(MIN_MAIN_CONNECTIONS, main_share)
+shard_budgets = [per_worker // count for server, count in engines_per_server.items() if server != main_server]
+if engines_per_server[main_server]:
+    shard_budgets.append((per_worker - 1 - main_connections) // engines_per_server[main_server])
+shard_connections = max(MIN_SHARD_CONNECTIONS, min(shard_budgets, default=MIN_SHARD_CONNECTIONS))
+
+available = db_max_connections - db_reserved_connections
+for server in {main_server, *engines_per_server}:
+    needed = workers * (engines_per_server[server] * shard_connections)
+    if server == main_server:
+        needed += workers * (1 + main_connections)
+    if needed > available:
+        logging.getLogger("gunicorn.error").warning(
+            f"{workers} workers may open {needed} connections to {server[0]}:{server[1]}, more than the "
+            f"{available} available; lower WEB_CONCURRENCY or SCHEDULER_WORKERS, or raise DB_MAX_CONNECTIONS"
+        )
+
+pool_size, max_overflow = _split(main_connections)
+os.environ.setdefault("DB_POOL_SIZE", str(pool_size))
+os.environ.setdefault("DB_MAX_OVERFLOW", str(max_overflow))
+if shard_urls:
+    pool_size, max_overflow = _split(shard_connections)
+    os.environ.setdefault("SHARD_POOL_SIZE", str(pool_size))
+    os.environ.setdefault("SHARD_MAX_OVERFLOW", str(max_overflow))
+
+# Share cores between web workers and the CSV validation pools they start
+os.environ.setdefault("CSV_WORKERS", str(max(1, cpu_count // workers)))
@@ -5,11 +5,17 @@ from .employee import Employee
 from .department import Department
 from .audit_log import EmployeeAuditLog
 from .performance import PerformanceData
+from .department_snapshot import DepartmentDailySnapshot
+from .job_run import ScheduledJobRun
+from .employee_record import EmployeeRecord
 
 __all__ = [
     "Employee",
     "Department",
     "EmployeeAuditLog",
-    "PerformanceData"
+    "PerformanceData",
+    "DepartmentDailySnapshot",
+    "ScheduledJobRun",
+    "EmployeeRecord"
 ]
 
@@ -15,6 +15,8 @@ class EmployeeAuditLog(Base):
     action_type = Column(String(20), nullable=False, index=True)
     old_salary = Column(Numeric(10, 2), nullable=True)
     new_salary = Column(Numeric(10, 2), nullable=True)
+    old_status = Column(String(20), nullable=True)
+    new_status = Column(String(20), nullable=True)
     timestamp = Column(DateTime, server_default=func.now(), index=True)
 
     # Relationships
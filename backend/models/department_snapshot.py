@@ -0,0 +1,23 @@
+"""
+Department daily snapshot model for Employee Analytics Platform
+"""
+from sqlalchemy import Column, Integer, Numeric, Date, ForeignKey
+from database import Base
+
+
+class DepartmentDailySnapshot(Base):
+    __tablename__ = "department_daily_snapshot"
+
+    snapshot_date = Column(Date, primary_key=True)
+    department_id = Column(Integer, ForeignKey("departments.department_id", ondelete="CASCADE"), primary_key=True, index=True)
+    headcount = Column(Integer, nullable=False, default=0)
+    active_payroll = Column(Numeric(14, 2), nullable=False, default=0)
+    hires = Column(Integer, nullable=False, default=0)
+    resignations = Column(Integer, nullable=False, default=0)
+    tenure_under_1y = Column(Integer, nullable=False, default=0)
+    tenure_1_3y = Column(Integer, nullable=False, default=0)
+    tenure_3_5y = Column(Integer, nullable=False, default=0)
+    tenure_over_5y = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<DepartmentDailySnapshot(date={self.snapshot_date}, department_id={self.department_id}, headcount={self.headcount})>"
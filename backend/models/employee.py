@@ -22,8 +22,9 @@ class Employee(Base):
 
     # Relationships
     department = relationship("Department", back_populates="employees")
-    audit_logs = relationship("EmployeeAuditLog", back_populates="employee", cascade="all, delete-orphan")
-    performance_data = relationship("PerformanceData", back_populates="employee", cascade="all, delete-orphan")
+    # passive_deletes leaves child rows to the database ON DELETE CASCADE
+    audit_logs = relationship("EmployeeAuditLog", back_populates="employee", cascade="all, delete-orphan", passive_deletes=True)
+    performance_data = relationship("PerformanceData", back_populates="employee", cascade="all, delete-orphan", passive_deletes=True)
 
     __table_args__ = (
         CheckConstraint("salary >= 0", name="check_salary_positive"),
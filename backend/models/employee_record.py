@@ -0,0 +1,38 @@
+"""
+Lightweight read-only employee record for large result sets
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import NamedTuple, Optional
+import sys
+
+
+class EmployeeRecord(NamedTuple):
+    """
+    Tuple-backed employee row returned by read-only service methods.
+
+    Unlike an ORM Employee it carries no instance state, identity-map entry or
+    per-attribute dict, so large lists cost little more than the values
+    themselves. Status strings are interned so every row shares one object.
+    Attribute names match Employee, so response models read it unchanged.
+    """
+    employee_id: int
+    first_name: str
+    last_name: str
+    email: str
+    salary: Decimal
+    department_id: int
+    date_joined: date
+    last_updated: Optional[datetime]
+    status: Optional[str]
+
+    @classmethod
+    def from_row(cls, row) -> "EmployeeRecord":
+        """Build a record from a row selected with the employee columns in table order"""
+        (employee_id, first_name, last_name, email, salary,
+         department_id, date_joined, last_updated, status) = row
+        return cls(
+            employee_id, first_name, last_name, email, salary,
+            department_id, date_joined, last_updated,
+            sys.intern(status) if status else status
+        )
@@ -0,0 +1,26 @@
+"""
+Scheduled job run model for Employee Analytics Platform
+"""
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Text, CheckConstraint, Index
+from database import Base
+
+
+class ScheduledJobRun(Base):
+    __tablename__ = "scheduled_job_runs"
+
+    run_id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String(100), nullable=False)
+    # Cron tick the run belongs to; NULL for manual and non-exclusive runs
+    scheduled_for = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=False, index=True)
+    duration_ms = Column(Numeric(12, 1), nullable=True)
+    status = Column(String(20), nullable=False)
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        CheckConstraint("status IN ('running', 'success', 'failed')", name="scheduled_job_runs_status_check"),
+        Index("idx_job_runs_tick", "job_name", "scheduled_for", unique=True),
+    )
+
+    def __repr__(self):
+        return f"<ScheduledJobRun(id={self.run_id}, job={self.job_name}, status={self.status})>"
@@ -0,0 +1,61 @@
+"""
+Admin API routes for scheduled jobs and query profiles
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from database import get_db
+from services.scheduler import Scheduler
+from services.jobs import get_scheduler
+from services.query_profiler import recent_profiles
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/jobs")
+def get_jobs(
+    recent: int = 20,
+    db: Session = Depends(get_db),
+    scheduler: Scheduler = Depends(get_scheduler)
+):
+    """Get scheduled job status for this worker and recent runs across all workers"""
+    if recent < 0 or recent > 500:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="recent must be between 0 and 500"
+        )
+    
+    return {
+        "jobs": scheduler.status(),
+        "recent_runs": scheduler.recent_runs(db, limit=recent) if recent else []
+    }
+
+
+@router.post("/jobs/{job_name}/run", status_code=status.HTTP_202_ACCEPTED)
+def run_job(job_name: str, scheduler: Scheduler = Depends(get_scheduler)):
+    """Trigger a scheduled job now"""
+    if job_name not in scheduler.jobs:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_name} not found"
+        )
+    if not scheduler.trigger(job_name):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_name} is already running or the scheduler is stopped"
+        )
+    return {"job": job_name, "status": "started"}
+
+
+@router.get("/profiles")
+def get_query_profiles(limit: int = 20, n_plus_one: bool = False):
+    """
+    Get recent request query profiles from this worker, newest first.
+    Requests are profiled with QUERY_PROFILING=all or the X-Profile-Queries: 1 header.
+    """
+    if limit < 1 or limit > 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limit must be between 1 and 100"
+        )
+    
+    return {"profiles": recent_profiles(limit=limit, n_plus_one_only=n_plus_one)}
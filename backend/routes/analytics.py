@@ -2,14 +2,38 @@
 Analytics API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field
+from datetime import date, timedelta
+import json
 from database import get_db
-from services.analytics_service import AnalyticsService
+from services.analytics_service import AnalyticsService, TIMESERIES_RESOLUTIONS
+from services.simulation_service import SimulationService
+from services.department_registry import DepartmentRegistry, get_department_registry
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
+class RaiseRule(BaseModel):
+    department_id: Optional[int] = None
+    department_name: Optional[str] = None
+    status: Optional[str] = Field(None, pattern="^(active|resigned)$")
+    min_tenure_years: Optional[float] = Field(None, ge=0)
+    max_tenure_years: Optional[float] = Field(None, gt=0)
+    raise_percent: float = Field(default=0, ge=-100)
+    raise_amount: float = 0
+
+
+class SimulationRequest(BaseModel):
+    rules: List[RaiseRule] = Field(..., min_length=1)
+    statuses: List[str] = Field(default=["active"], min_length=1)
+    as_of: Optional[date] = None
+    refresh: bool = False
+    commit: bool = False
+
+
 @router.get("/top_departments")
 def get_top_departments(limit: int = 5, db: Session = Depends(get_db)):
     """Get top N departments by average salary using CTE"""
@@ -38,6 +62,32 @@ def get_department_statistics(department_id: int, db: Session = Depends(get_db))
     return stats
 
 
+@router.get("/departments/stats")
+def get_departments_statistics(ids: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Get statistics for many departments in one query.
+    ids is a comma-separated list of department IDs; omit it for all departments.
+    The JSON response is streamed as rows are produced.
+    """
+    department_ids = None
+    if ids:
+        try:
+            department_ids = [int(value) for value in ids.split(",") if value.strip()]
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ids must be a comma-separated list of integers"
+            )
+    
+    def generate():
+        yield '{"departments": ['
+        for index, stats in enumerate(AnalyticsService.iter_department_statistics(db, department_ids)):
+            yield ("," if index else "") + json.dumps(stats)
+        yield "]}"
+    
+    return StreamingResponse(generate(), media_type="application/json")
+
+
 @router.get("/salary_insights")
 def get_salary_insights(db: Session = Depends(get_db)):
     """Get overall salary insights and trends"""
@@ -74,3 +124,90 @@ def get_audit_summary(days: int = 30, db: Session = Depends(get_db)):
     summary = AnalyticsService.get_audit_log_summary(db, days=days)
     return summary
 
+
+@router.get("/timeseries")
+def get_headcount_timeseries(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    resolution: str = "month",
+    department_id: Optional[int] = None,
+    per_department: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Get headcount, payroll, hires/resignations and tenure over time from daily snapshots"""
+    if resolution not in TIMESERIES_RESOLUTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"resolution must be one of {', '.join(TIMESERIES_RESOLUTIONS)}"
+        )
+    
+    end = end or date.today()
+    start = start or end - timedelta(days=365)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    
+    return AnalyticsService.get_headcount_timeseries(
+        db, start, end, resolution=resolution,
+        department_id=department_id, per_department=per_department
+    )
+
+
+@router.post("/timeseries/refresh")
+def refresh_timeseries(through: Optional[date] = None, db: Session = Depends(get_db)):
+    """Write missing department daily snapshots, back-filling from the audit log"""
+    return AnalyticsService.refresh_department_snapshots(db, through=through)
+
+
+@router.post("/simulate")
+def simulate_payroll(
+    scenario: SimulationRequest,
+    db: Session = Depends(get_db),
+    registry: DepartmentRegistry = Depends(get_department_registry)
+):
+    """
+    Project payroll under raise rules (first matching rule wins) without
+    writing anything. With commit, the scenario is then applied to the
+    employees table in one set-based update.
+    """
+    rules = []
+    for index, rule in enumerate(scenario.rules):
+        rule_data = rule.model_dump(exclude={"department_name"})
+        if rule.department_name:
+            department = registry.get_by_name(db, rule.department_name)
+            if not department:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Rule {index}: department '{rule.department_name}' not found"
+                )
+            rule_data["department_id"] = department["department_id"]
+        rules.append(rule_data)
+    
+    department_names = {
+        department["department_id"]: department["department_name"] for department in registry.all(db)
+    }
+    try:
+        result = SimulationService.simulate(
+            db, rules, statuses=scenario.statuses, as_of=scenario.as_of,
+            refresh=scenario.refresh or scenario.commit, department_names=department_names
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    result["committed"] = False
+    if scenario.commit:
+        if result["invalid_salaries"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Scenario would give {result['invalid_salaries']} employees an out-of-range salary"
+            )
+        try:
+            result["updated_employees"] = SimulationService.apply(
+                db, rules, statuses=scenario.statuses, as_of=scenario.as_of
+            )
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        result["committed"] = True
+    return result
@@ -0,0 +1,74 @@
+"""
+Audit log API routes
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+from database import get_db
+from services.audit_service import AuditService, AUDIT_ACTIONS
+from services.employee_service import EmployeeService
+
+router = APIRouter(prefix="/audit", tags=["audit"])
+
+
+def _check_range(since: Optional[datetime], until: Optional[datetime]) -> None:
+    if since and until and since >= until:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="since must be before until"
+        )
+
+
+@router.get("/")
+def get_audit_entries(
+    employee_id: Optional[int] = None,
+    action_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    before: Optional[int] = None,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """
+    Get audit log entries newest first, filtered by employee, action type
+    (INSERT/UPDATE/DELETE) and a [since, until) time range.
+    Pages are keyed on log_id: pass next_cursor as `before` for the next page.
+    """
+    if limit < 1 or limit > 1000:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="limit must be between 1 and 1000"
+        )
+    if action_type:
+        action_type = action_type.upper()
+        if action_type not in AUDIT_ACTIONS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"action_type must be one of {', '.join(AUDIT_ACTIONS)}"
+            )
+    _check_range(since, until)
+    
+    return AuditService.get_entries(
+        db, employee_id=employee_id, action_type=action_type,
+        since=since, until=until, before=before, limit=limit
+    )
+
+
+@router.get("/employees/{employee_id}/salary_timeline")
+def get_salary_timeline(
+    employee_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Get an employee's salary changes with running totals, peak and intervals"""
+    _check_range(since, until)
+    
+    timeline = AuditService.get_salary_timeline(db, employee_id, since=since, until=until)
+    if not timeline["timeline"] and not EmployeeService.get_employee(db, employee_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Employee with ID {employee_id} not found"
+        )
+    return timeline
@@ -5,11 +5,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Dict, Any
-import csv
-import io
 from database import get_db
 from services.employee_service import EmployeeService
-from models.department import Department
+from services.csv_pipeline import iter_validated_batches
+from services.upload_formats import iter_upload_tasks
+from services.department_registry import DepartmentRegistry, get_department_registry
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
@@ -21,85 +21,55 @@ class UploadResponse(BaseModel):
     errors: List[Dict[str, Any]]
 
 
+@router.post("/employees", response_model=UploadResponse)
 @router.post("/csv/employees", response_model=UploadResponse)
-async def upload_employees_csv(
+def upload_employees_csv(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    registry: DepartmentRegistry = Depends(get_department_registry)
 ):
     """
-    Upload CSV file with employee data and process automatically.
+    Upload employee data and process automatically.
+    Accepts CSV, NDJSON (.ndjson/.jsonl) and Parquet files; CSV and NDJSON may be
+    gzip (.gz) or zstd (.zst) compressed. The file is decoded incrementally.
     Expected CSV format: first_name,last_name,email,salary,department_id,date_joined,status
+
+    Declared with plain def so FastAPI runs the blocking reads, worker waits
+    and inserts in its thread pool instead of on the event loop.
     """
-    if not file.filename.endswith('.csv'):
+    try:
+        tasks, first_row = iter_upload_tasks(file.file, file.filename)
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="File must be a CSV file"
+            detail=str(e)
         )
     
     try:
-        contents = await file.read()
-        csv_content = io.StringIO(contents.decode('utf-8'))
-        reader = csv.DictReader(csv_content)
+        department_ids = frozenset(d["department_id"] for d in registry.all(db))
         
         successful = 0
         failed = 0
         errors = []
         
-        for row_num, row in enumerate(reader, start=2):  # Start at 2 (1 is header)
-            try:
-                # Validate required fields
-                required_fields = ['first_name', 'last_name', 'email', 'salary', 'department_id', 'date_joined']
-                missing_fields = [field for field in required_fields if not row.get(field)]
-                
-                if missing_fields:
+        # Chunks are parsed and validated in worker processes and arrive in file order
+        for valid_rows, row_errors in iter_validated_batches(tasks, department_ids, first_row=first_row):
+            errors.extend(row_errors)
+            failed += len(row_errors)
+            
+            results = EmployeeService.bulk_load_employees(db, [data for _, data in valid_rows])
+            for (row_num, data), result in zip(valid_rows, results):
+                if result["success"]:
+                    successful += 1
+                else:
                     errors.append({
                         "row": row_num,
-                        "error": f"Missing required fields: {', '.join(missing_fields)}",
-                        "data": row
+                        "error": result["error_message"],
+                        "data": data
                     })
                     failed += 1
-                    continue
-                
-                # Validate department exists
-                department_id = int(row['department_id'])
-                department = db.query(Department).filter(Department.department_id == department_id).first()
-                if not department:
-                    errors.append({
-                        "row": row_num,
-                        "error": f"Department with ID {department_id} not found",
-                        "data": row
-                    })
-                    failed += 1
-                    continue
-                
-                # Create employee
-                employee_data = {
-                    "first_name": row['first_name'].strip(),
-                    "last_name": row['last_name'].strip(),
-                    "email": row['email'].strip().lower(),
-                    "salary": float(row['salary']),
-                    "department_id": department_id,
-                    "date_joined": row['date_joined'],
-                    "status": row.get('status', 'active').strip()
-                }
-                
-                EmployeeService.create_employee(db, employee_data)
-                successful += 1
-                
-            except ValueError as e:
-                errors.append({
-                    "row": row_num,
-                    "error": f"Invalid data format: {str(e)}",
-                    "data": row
-                })
-                failed += 1
-            except Exception as e:
-                errors.append({
-                    "row": row_num,
-                    "error": str(e),
-                    "data": row
-                })
-                failed += 1
+        
+        errors.sort(key=lambda error: error["row"])
         
         return UploadResponse(
             total_rows=successful + failed,
@@ -111,6 +81,6 @@ async def upload_employees_csv(
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Error processing CSV file: {str(e)}"
+            detail=f"Error processing upload: {str(e)}"
         )
 
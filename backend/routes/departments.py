@@ -7,6 +7,8 @@ from typing import List
 from pydantic import BaseModel, Field
 from database import get_db
 from models.department import Department
+from services.department_registry import DepartmentRegistry, get_department_registry
+from services.sharding import replicate_departments
 
 router = APIRouter(prefix="/departments", tags=["departments"])
 
@@ -29,14 +31,20 @@ class DepartmentResponse(DepartmentBase):
 
 
 @router.post("/", response_model=DepartmentResponse, status_code=status.HTTP_201_CREATED)
-def create_department(department: DepartmentCreate, db: Session = Depends(get_db)):
+def create_department(
+    department: DepartmentCreate,
+    db: Session = Depends(get_db),
+    registry: DepartmentRegistry = Depends(get_department_registry)
+):
     """Create a new department"""
     try:
         db_department = Department(**department.model_dump())
         db.add(db_department)
         db.commit()
         db.refresh(db_department)
-        return db_department
+        registry.invalidate()
+        replicate_departments(db)
+        return DepartmentRegistry.to_dict(db_department)
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -46,16 +54,22 @@ def create_department(department: DepartmentCreate, db: Session = Depends(get_db
 
 
 @router.get("/", response_model=List[DepartmentResponse])
-def get_all_departments(db: Session = Depends(get_db)):
+def get_all_departments(
+    db: Session = Depends(get_db),
+    registry: DepartmentRegistry = Depends(get_department_registry)
+):
     """Get all departments"""
-    departments = db.query(Department).all()
-    return departments
+    return registry.all(db)
 
 
 @router.get("/{department_id}", response_model=DepartmentResponse)
-def get_department(department_id: int, db: Session = Depends(get_db)):
+def get_department(
+    department_id: int,
+    db: Session = Depends(get_db),
+    registry: DepartmentRegistry = Depends(get_department_registry)
+):
     """Get department by ID"""
-    department = db.query(Department).filter(Department.department_id == department_id).first()
+    department = registry.get(db, department_id)
     if not department:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
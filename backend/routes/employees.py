@@ -97,7 +97,13 @@ def update_employee(
 ):
     """Update employee information"""
     update_data = employee_update.model_dump(exclude_unset=True)
-    employee = EmployeeService.update_employee(db, employee_id, update_data)
+    try:
+        employee = EmployeeService.update_employee(db, employee_id, update_data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     if not employee:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,60 @@
+"""
+Bulk export API routes (Arrow IPC / Parquet)
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+from database import get_db
+from services.export_service import ExportService, EXPORT_TABLES, EXPORT_FORMATS
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream"
+}
+
+FILE_EXTENSIONS = {
+    "parquet": "parquet",
+    "arrow": "arrows"
+}
+
+
+@router.get("/{table}")
+def export_table(
+    table: str,
+    format: str = "parquet",
+    department_id: Optional[int] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream a table as Parquet or an Arrow IPC stream.
+    Rows are read from a server-side cursor and encoded batch by batch.
+    Filters: department_id, status (active/resigned) and a [since, until)
+    range on date_joined, timestamp or created_at depending on the table.
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown export table: {table}. Choose from {', '.join(EXPORT_TABLES)}"
+        )
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"format must be one of {', '.join(EXPORT_FORMATS)}"
+        )
+    
+    content = ExportService.iter_bytes(
+        db, table, format,
+        department_id=department_id, status=status_filter, since=since, until=until
+    )
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{FILE_EXTENSIONS[format]}"'}
+    )
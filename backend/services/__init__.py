@@ -3,6 +3,19 @@ Services for Employee Analytics Platform
 """
 from .employee_service import EmployeeService
 from .analytics_service import AnalyticsService
+from .export_service import ExportService
+from .simulation_service import SimulationService
+from .audit_service import AuditService
+from .department_registry import DepartmentRegistry, department_registry, get_department_registry
 
-__all__ = ["EmployeeService", "AnalyticsService"]
+__all__ = [
+    "EmployeeService",
+    "AnalyticsService",
+    "ExportService",
+    "SimulationService",
+    "AuditService",
+    "DepartmentRegistry",
+    "department_registry",
+    "get_department_registry"
+]
 
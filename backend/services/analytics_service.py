@@ -3,41 +3,124 @@ Analytics service layer for KPI and reporting queries
 """
 from sqlalchemy.orm import Session
 from sqlalchemy import func, text
-from typing import List, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
+from datetime import date, timedelta
+from types import SimpleNamespace
+from database import shard_router
+from services.prepared_statements import register_statement, execute_prepared
+from services.sharding import fan_out, department_session, shard_session, locate_employee, QuantileSketch
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# How far back the first snapshot refresh back-fills from the audit log
+SNAPSHOT_BACKFILL_DAYS = int(os.getenv("SNAPSHOT_BACKFILL_DAYS", 730))
+
+# Days written per refresh_department_snapshots call (one transaction each)
+SNAPSHOT_REFRESH_BATCH_DAYS = 31
+
+TIMESERIES_RESOLUTIONS = ("day", "week", "month", "quarter", "year")
+
+# Timeseries columns summed when merging shards
+TIMESERIES_SUM_COLUMNS = ("headcount", "active_payroll", "hires", "resignations",
+                          "tenure_under_1y", "tenure_1_3y", "tenure_3_5y", "tenure_over_5y")
+
+# Rows removed per statement by audit log retention
+AUDIT_PURGE_BATCH_ROWS = 10000
+
+# Hot read queries, prepared once per pooled connection (see services.prepared_statements)
+TOP_DEPARTMENTS_BY_SALARY = register_statement("top_departments_by_salary", """
+    WITH avg_sal AS (
+        SELECT 
+            department_id, 
+            AVG(salary) as avg_salary,
+            COUNT(*) as employee_count
+        FROM employees
+        WHERE status = 'active'
+        GROUP BY department_id
+    )
+    SELECT 
+        d.department_id,
+        d.department_name,
+        d.location,
+        a.avg_salary,
+        a.employee_count
+    FROM avg_sal a
+    JOIN departments d ON d.department_id = a.department_id
+    ORDER BY a.avg_salary DESC
+    LIMIT :limit
+""", {"limit": "integer"})
+
+DEPARTMENT_STATS = register_statement("department_stats", """
+    SELECT * FROM get_department_stats(:dept_id)
+""", {"dept_id": "integer"})
+
+ACTIVE_EMPLOYEE_COUNT = register_statement("active_employee_count", """
+    SELECT COUNT(*) as count FROM employees WHERE status = 'active'
+""")
+
+RESIGNED_EMPLOYEE_COUNT = register_statement("resigned_employee_count", """
+    SELECT COUNT(*) as count FROM employees WHERE status = 'resigned'
+""")
+
+ACTIVE_SALARY_STATS = register_statement("active_salary_stats", """
+    SELECT 
+        AVG(salary) as avg_salary,
+        MAX(salary) as max_salary,
+        MIN(salary) as min_salary,
+        PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY salary) as median_salary
+    FROM employees
+    WHERE status = 'active'
+""")
+
+DEPARTMENT_DISTRIBUTION = register_statement("department_distribution", """
+    SELECT 
+        d.department_name,
+        COUNT(e.employee_id) as employee_count,
+        AVG(e.salary) as avg_salary
+    FROM departments d
+    LEFT JOIN employees e ON d.department_id = e.department_id AND e.status = 'active'
+    GROUP BY d.department_id, d.department_name
+    ORDER BY employee_count DESC
+""")
+
+SALARY_GROWTH = register_statement("salary_growth", """
+    SELECT calculate_salary_growth(:emp_id, :months_back) as growth_percent
+""", {"emp_id": "integer", "months_back": "integer"})
+
+AUDIT_SUMMARY = register_statement("audit_summary", """
+    SELECT 
+        action_type,
+        COUNT(*) as count
+    FROM employee_audit_log
+    WHERE timestamp >= NOW() - INTERVAL '1 day' * :days
+    GROUP BY action_type
+""", {"days": "integer"})
+
+
+# Relative accuracy of the merged median when salary insights span shards
+SHARDED_PERCENTILE_ACCURACY = 0.005
+
 
 class AnalyticsService:
-    """Service class for analytics operations"""
+    """
+    Service class for analytics operations.
+
+    With sharding, per-department queries run on the department's shard and
+    company-wide aggregates run on every shard concurrently; the partial
+    results (counts, sums, min/max, quantile sketches) are merged here.
+    """
 
     @staticmethod
     def get_top_departments_by_salary(db: Session, limit: int = 5) -> List[Dict[str, Any]]:
         """Get top N departments by average salary using CTE"""
-        query = text("""
-            WITH avg_sal AS (
-                SELECT 
-                    department_id, 
-                    AVG(salary) as avg_salary,
-                    COUNT(*) as employee_count
-                FROM employees
-                WHERE status = 'active'
-                GROUP BY department_id
-            )
-            SELECT 
-                d.department_id,
-                d.department_name,
-                d.location,
-                a.avg_salary,
-                a.employee_count
-            FROM avg_sal a
-            JOIN departments d ON d.department_id = a.department_id
-            ORDER BY a.avg_salary DESC
-            LIMIT :limit
-        """)
-        
-        result = db.execute(query, {"limit": limit})
+        # A department lives on one shard, so each shard's top N holds the overall top N
+        results = fan_out(db, lambda session: execute_prepared(session, TOP_DEPARTMENTS_BY_SALARY, {"limit": limit}).all())
+        rows = sorted(
+            (row for shard_rows in results.values() for row in shard_rows),
+            key=lambda row: row.avg_salary, reverse=True
+        )[:limit]
         
         return [
             {
@@ -47,14 +130,14 @@ class AnalyticsService:
                 "avg_salary": float(row.avg_salary),
                 "employee_count": row.employee_count
             }
-            for row in result
+            for row in rows
         ]
 
     @staticmethod
     def get_department_statistics(db: Session, department_id: int) -> Dict[str, Any]:
         """Get comprehensive department statistics using stored function"""
-        query = text("SELECT * FROM get_department_stats(:dept_id)")
-        result = db.execute(query, {"dept_id": department_id}).first()
+        with department_session(db, department_id) as session:
+            result = execute_prepared(session, DEPARTMENT_STATS, {"dept_id": department_id}).first()
         
         if not result:
             return {}
@@ -68,42 +151,59 @@ class AnalyticsService:
             "min_salary": float(result.min_salary) if result.min_salary else 0
         }
 
+    @staticmethod
+    def iter_department_statistics(
+        db: Session,
+        department_ids: Optional[List[int]] = None,
+        batch_rows: int = 500
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Statistics for many departments (or all when department_ids is None)
+        from one grouped query, yielded row by row from a server-side cursor.
+        """
+        query = text("SELECT * FROM get_department_stats_batch(CAST(:dept_ids AS INTEGER[]))")
+        if shard_router.sharded:
+            # Every shard holds all departments, so ask each only for its own
+            if department_ids is None:
+                department_ids = list(db.execute(text("SELECT department_id FROM departments")).scalars())
+            by_shard: Dict[str, List[int]] = {}
+            for department_id in department_ids:
+                by_shard.setdefault(shard_router.shard_for_department(department_id), []).append(department_id)
+            results = fan_out(
+                db,
+                lambda session: session.execute(query, {"dept_ids": by_shard[session.info["shard"]]}).all(),
+                shards=by_shard
+            )
+            result = sorted((row for rows in results.values() for row in rows), key=lambda row: row.department_id)
+        else:
+            result = db.execute(query, {"dept_ids": department_ids}, execution_options={"yield_per": batch_rows})
+        
+        for row in result:
+            yield {
+                "department_id": row.department_id,
+                "department_name": row.department_name,
+                "total_employees": row.total_employees,
+                "active_employees": row.active_employees,
+                "avg_salary": float(row.avg_salary) if row.avg_salary else 0,
+                "max_salary": float(row.max_salary) if row.max_salary else 0,
+                "min_salary": float(row.min_salary) if row.min_salary else 0
+            }
+
     @staticmethod
     def get_salary_insights(db: Session) -> Dict[str, Any]:
         """Get overall salary insights and trends"""
-        # Active vs Resigned
-        active_count_query = text("SELECT COUNT(*) as count FROM employees WHERE status = 'active'")
-        resigned_count_query = text("SELECT COUNT(*) as count FROM employees WHERE status = 'resigned'")
+        if shard_router.sharded:
+            return AnalyticsService._get_sharded_salary_insights(db)
         
-        active_count = db.execute(active_count_query).scalar()
-        resigned_count = db.execute(resigned_count_query).scalar()
+        # Active vs Resigned
+        active_count = execute_prepared(db, ACTIVE_EMPLOYEE_COUNT).scalar()
+        resigned_count = execute_prepared(db, RESIGNED_EMPLOYEE_COUNT).scalar()
         
         # Salary statistics
-        salary_stats_query = text("""
-            SELECT 
-                AVG(salary) as avg_salary,
-                MAX(salary) as max_salary,
-                MIN(salary) as min_salary,
-                PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY salary) as median_salary
-            FROM employees
-            WHERE status = 'active'
-        """)
-        
-        salary_stats = db.execute(salary_stats_query).first()
+        salary_stats = execute_prepared(db, ACTIVE_SALARY_STATS).first()
         
         # Department distribution
-        dept_dist_query = text("""
-            SELECT 
-                d.department_name,
-                COUNT(e.employee_id) as employee_count,
-                AVG(e.salary) as avg_salary
-            FROM departments d
-            LEFT JOIN employees e ON d.department_id = e.department_id AND e.status = 'active'
-            GROUP BY d.department_id, d.department_name
-            ORDER BY employee_count DESC
-        """)
-        
-        dept_dist = db.execute(dept_dist_query)
+        dept_dist = execute_prepared(db, DEPARTMENT_DISTRIBUTION)
         
         return {
             "active_employees": active_count,
@@ -125,11 +225,86 @@ class AnalyticsService:
             ]
         }
 
+    @staticmethod
+    def _get_sharded_salary_insights(db: Session) -> Dict[str, Any]:
+        """
+        Salary insights merged from per-shard partial aggregates: counts and
+        sums for averages, min/max, and a quantile sketch for the median
+        (within SHARDED_PERCENTILE_ACCURACY of the exact value).
+        """
+        sketch = QuantileSketch(SHARDED_PERCENTILE_ACCURACY)
+        
+        def partial(session: Session) -> Dict[str, Any]:
+            totals = session.execute(text("""
+                SELECT 
+                    COUNT(*) FILTER (WHERE status = 'active') AS active_count,
+                    COUNT(*) FILTER (WHERE status = 'resigned') AS resigned_count,
+                    SUM(salary) FILTER (WHERE status = 'active') AS salary_sum,
+                    MAX(salary) FILTER (WHERE status = 'active') AS max_salary,
+                    MIN(salary) FILTER (WHERE status = 'active') AS min_salary
+                FROM employees
+            """)).first()
+            buckets = session.execute(text(f"""
+                SELECT {sketch.bucket_sql("salary")} AS bucket, COUNT(*)
+                FROM employees
+                WHERE status = 'active'
+                GROUP BY 1
+            """)).all()
+            departments = session.execute(text("""
+                SELECT department_id, COUNT(*) AS employee_count, SUM(salary) AS salary_sum
+                FROM employees
+                WHERE status = 'active'
+                GROUP BY department_id
+            """)).all()
+            return {"totals": totals, "buckets": buckets, "departments": departments}
+        
+        partials = list(fan_out(db, partial).values())
+        
+        active_count = sum(p["totals"].active_count for p in partials)
+        resigned_count = sum(p["totals"].resigned_count for p in partials)
+        salary_sum = sum(p["totals"].salary_sum or 0 for p in partials)
+        max_values = [p["totals"].max_salary for p in partials if p["totals"].max_salary is not None]
+        min_values = [p["totals"].min_salary for p in partials if p["totals"].min_salary is not None]
+        for p in partials:
+            sketch.add_buckets(p["buckets"])
+        median = sketch.quantile(0.5)
+        
+        department_totals: Dict[int, List] = {}
+        for p in partials:
+            for row in p["departments"]:
+                totals = department_totals.setdefault(row.department_id, [0, 0])
+                totals[0] += row.employee_count
+                totals[1] += row.salary_sum or 0
+        
+        # Every department is listed, as with the LEFT JOIN of the single-database query
+        distribution = []
+        for department in db.execute(text("SELECT department_id, department_name FROM departments")):
+            count, total = department_totals.get(department.department_id, (0, 0))
+            distribution.append({
+                "department_name": department.department_name,
+                "employee_count": count,
+                "avg_salary": float(total / count) if count else 0
+            })
+        distribution.sort(key=lambda row: row["employee_count"], reverse=True)
+        
+        return {
+            "active_employees": active_count,
+            "resigned_employees": resigned_count,
+            "total_employees": active_count + resigned_count,
+            "salary_statistics": {
+                "avg_salary": float(salary_sum / active_count) if active_count else 0,
+                "max_salary": float(max(max_values)) if max_values else 0,
+                "min_salary": float(min(min_values)) if min_values else 0,
+                "median_salary": round(median, 2) if median else 0
+            },
+            "department_distribution": distribution
+        }
+
     @staticmethod
     def get_salary_growth_trend(db: Session, employee_id: int, months_back: int = 12) -> Dict[str, Any]:
         """Get salary growth trend for an employee"""
-        query = text("SELECT calculate_salary_growth(:emp_id, :months_back) as growth_percent")
-        result = db.execute(query, {"emp_id": employee_id, "months_back": months_back}).first()
+        with shard_session(db, locate_employee(db, employee_id) or shard_router.names[0]) as session:
+            result = execute_prepared(session, SALARY_GROWTH, {"emp_id": employee_id, "months_back": months_back}).first()
         
         return {
             "employee_id": employee_id,
@@ -140,18 +315,12 @@ class AnalyticsService:
     @staticmethod
     def get_audit_log_summary(db: Session, days: int = 30) -> Dict[str, Any]:
         """Get audit log summary for the last N days"""
-        query = text("""
-            SELECT 
-                action_type,
-                COUNT(*) as count
-            FROM employee_audit_log
-            WHERE timestamp >= NOW() - INTERVAL '1 day' * :days
-            GROUP BY action_type
-        """)
-        
-        result = db.execute(query, {"days": days})
+        results = fan_out(db, lambda session: execute_prepared(session, AUDIT_SUMMARY, {"days": days}).all())
         
-        summary = {row.action_type: row.count for row in result}
+        summary: Dict[str, int] = {}
+        for rows in results.values():
+            for row in rows:
+                summary[row.action_type] = summary.get(row.action_type, 0) + row.count
         
         return {
             "period_days": days,
@@ -159,3 +328,175 @@ class AnalyticsService:
             "total_actions": sum(summary.values())
         }
 
+    @staticmethod
+    def refresh_department_snapshots(db: Session, through: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Incrementally write department daily snapshots up to `through` (default today).
+        The latest existing day is recomputed since it may have been taken mid-day;
+        on first run, history is back-filled from the audit log.
+        """
+        through = through or date.today()
+        
+        # Each shard snapshots its own employees; timeseries sums the shards
+        def refresh(session: Session):
+            last_snapshot = session.execute(text("SELECT MAX(snapshot_date) FROM department_daily_snapshot")).scalar()
+            
+            if last_snapshot:
+                start = min(last_snapshot, through)
+            else:
+                first_joined = session.execute(text("SELECT MIN(date_joined) FROM employees")).scalar()
+                start = max(first_joined or through, through - timedelta(days=SNAPSHOT_BACKFILL_DAYS))
+            
+            query = text("SELECT refresh_department_snapshots(:from_date, :to_date)")
+            rows_written = 0
+            batch_start = start
+            while batch_start <= through:
+                batch_end = min(batch_start + timedelta(days=SNAPSHOT_REFRESH_BATCH_DAYS - 1), through)
+                rows_written += session.execute(query, {"from_date": batch_start, "to_date": batch_end}).scalar() or 0
+                session.commit()
+                batch_start = batch_end + timedelta(days=1)
+            return start, rows_written
+        
+        results = list(fan_out(db, refresh).values())
+        start = min(shard_start for shard_start, _ in results)
+        rows_written = sum(shard_rows for _, shard_rows in results)
+        
+        logger.info(f"Refreshed department snapshots {start} to {through}: {rows_written} rows")
+        return {
+            "from_date": start.isoformat(),
+            "to_date": through.isoformat(),
+            "rows_written": rows_written
+        }
+
+    @staticmethod
+    def get_headcount_timeseries(
+        db: Session,
+        start: date,
+        end: date,
+        resolution: str = "month",
+        department_id: Optional[int] = None,
+        per_department: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Headcount, payroll, hires/resignations and tenure buckets per period from
+        the daily snapshot table. Stock values (headcount, payroll, tenure) are
+        taken at the last snapshot in each period; flows (hires, resignations)
+        are summed over the period.
+        """
+        if resolution not in TIMESERIES_RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {', '.join(TIMESERIES_RESOLUTIONS)}")
+        
+        group_columns = "period, department_id" if per_department else "period"
+        query = text(f"""
+            WITH periods AS (
+                SELECT 
+                    date_trunc(:resolution, snapshot_date)::DATE AS period,
+                    department_id,
+                    (ARRAY_AGG(headcount ORDER BY snapshot_date DESC))[1] AS headcount,
+                    (ARRAY_AGG(active_payroll ORDER BY snapshot_date DESC))[1] AS active_payroll,
+                    SUM(hires) AS hires,
+                    SUM(resignations) AS resignations,
+                    (ARRAY_AGG(tenure_under_1y ORDER BY snapshot_date DESC))[1] AS tenure_under_1y,
+                    (ARRAY_AGG(tenure_1_3y ORDER BY snapshot_date DESC))[1] AS tenure_1_3y,
+                    (ARRAY_AGG(tenure_3_5y ORDER BY snapshot_date DESC))[1] AS tenure_3_5y,
+                    (ARRAY_AGG(tenure_over_5y ORDER BY snapshot_date DESC))[1] AS tenure_over_5y
+                FROM department_daily_snapshot
+                WHERE snapshot_date BETWEEN :start AND :end
+                  AND (CAST(:department_id AS INTEGER) IS NULL OR department_id = :department_id)
+                GROUP BY 1, 2
+            )
+            SELECT 
+                {group_columns},
+                SUM(headcount) AS headcount,
+                SUM(active_payroll) AS active_payroll,
+                SUM(hires) AS hires,
+                SUM(resignations) AS resignations,
+                SUM(tenure_under_1y) AS tenure_under_1y,
+                SUM(tenure_1_3y) AS tenure_1_3y,
+                SUM(tenure_3_5y) AS tenure_3_5y,
+                SUM(tenure_over_5y) AS tenure_over_5y
+            FROM periods
+            GROUP BY {group_columns}
+            ORDER BY {group_columns}
+        """)
+        
+        params = {
+            "resolution": resolution,
+            "start": start,
+            "end": end,
+            "department_id": department_id
+        }
+        
+        if department_id is not None:
+            with department_session(db, department_id) as session:
+                result = session.execute(query, params).all()
+        else:
+            # Shards snapshot disjoint employees, so their period values add up
+            merged: Dict[Any, Dict[str, Any]] = {}
+            for rows in fan_out(db, lambda session: session.execute(query, params).all()).values():
+                for row in rows:
+                    values = dict(row._mapping)
+                    key = (row.period, row.department_id) if per_department else row.period
+                    if key not in merged:
+                        merged[key] = values
+                        continue
+                    for column in TIMESERIES_SUM_COLUMNS:
+                        merged[key][column] += values[column]
+            result = [SimpleNamespace(**merged[key]) for key in sorted(merged)]
+        
+        points = []
+        for row in result:
+            point = {
+                "period": row.period.isoformat(),
+                "headcount": int(row.headcount),
+                "active_payroll": float(row.active_payroll),
+                "hires": int(row.hires),
+                "resignations": int(row.resignations),
+                "tenure_buckets": {
+                    "under_1y": int(row.tenure_under_1y),
+                    "1_3y": int(row.tenure_1_3y),
+                    "3_5y": int(row.tenure_3_5y),
+                    "over_5y": int(row.tenure_over_5y)
+                }
+            }
+            if per_department:
+                point["department_id"] = row.department_id
+            points.append(point)
+        
+        return {
+            "resolution": resolution,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "department_id": department_id,
+            "points": points
+        }
+
+    @staticmethod
+    def purge_audit_log(db: Session, retention_days: int) -> Dict[str, Any]:
+        """
+        Delete audit log rows older than retention_days in small batches, so
+        each transaction stays short. Snapshots already written are kept.
+        """
+        query = text("""
+            DELETE FROM employee_audit_log
+            WHERE log_id IN (
+                SELECT log_id
+                FROM employee_audit_log
+                WHERE timestamp < NOW() - INTERVAL '1 day' * :days
+                LIMIT :batch_rows
+            )
+        """)
+        
+        def purge(session: Session) -> int:
+            deleted = 0
+            while True:
+                result = session.execute(query, {"days": retention_days, "batch_rows": AUDIT_PURGE_BATCH_ROWS})
+                session.commit()
+                deleted += result.rowcount
+                if result.rowcount < AUDIT_PURGE_BATCH_ROWS:
+                    return deleted
+        
+        deleted = sum(fan_out(db, purge).values())
+        
+        logger.info(f"Purged {deleted} audit log rows older than {retention_days} days")
+        return {"retention_days": retention_days, "deleted": deleted}
@@ -0,0 +1,208 @@
+"""
+Audit log query service for filtered history and salary timelines
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+from services.prepared_statements import register_statement, execute_prepared
+from services.sharding import fan_out, shard_session, locate_employee
+from itertools import islice
+import heapq
+import logging
+
+logger = logging.getLogger(__name__)
+
+AUDIT_ACTIONS = ("INSERT", "UPDATE", "DELETE")
+
+AUDIT_COLUMNS = "log_id, employee_id, action_type, old_salary, new_salary, old_status, new_status, timestamp"
+
+# Salary changes of one employee with running figures from window functions.
+# Windows run over the full history and the time range is applied afterwards,
+# so cumulative values do not depend on the requested range. Served by
+# idx_audit_employee_log (sql/02_indexes.sql) as an index-only scan.
+SALARY_TIMELINE = register_statement("employee_salary_timeline", """
+    SELECT *
+    FROM (
+        SELECT
+            log_id,
+            timestamp,
+            action_type,
+            old_salary,
+            new_salary,
+            new_salary - old_salary AS change,
+            ROUND((new_salary - old_salary) / NULLIF(old_salary, 0) * 100, 2) AS change_percent,
+            new_salary - FIRST_VALUE(new_salary) OVER w AS change_since_start,
+            MAX(new_salary) OVER w AS peak_salary,
+            ROW_NUMBER() OVER w - 1 AS change_number,
+            EXTRACT(EPOCH FROM timestamp - LAG(timestamp) OVER w) / 86400 AS days_since_previous
+        FROM employee_audit_log
+        WHERE employee_id = :emp_id
+          AND action_type <> 'DELETE'
+          AND new_salary IS DISTINCT FROM old_salary
+        WINDOW w AS (ORDER BY log_id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+    ) timeline
+    WHERE (CAST(:since AS TIMESTAMP) IS NULL OR timestamp >= :since)
+      AND (CAST(:until AS TIMESTAMP) IS NULL OR timestamp < :until)
+    ORDER BY log_id
+""", {"emp_id": "integer", "since": "timestamp", "until": "timestamp"})
+
+
+# First audit row at or after a moment, found on idx_audit_timestamp_log
+FIRST_LOG_ID_AT = text("""
+    SELECT log_id FROM employee_audit_log
+    WHERE timestamp >= :at
+    ORDER BY timestamp, log_id
+    LIMIT 1
+""")
+
+
+def _number(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+class AuditService:
+    """Service class for audit log queries"""
+
+    @staticmethod
+    def get_entries(
+        db: Session,
+        employee_id: Optional[int] = None,
+        action_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        before: Optional[int] = None,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Get audit entries newest first with keyset pagination on log_id.
+        Pass the returned next_cursor as `before` to get the following page;
+        unlike OFFSET, each page costs the same however deep it is. With
+        shards, every shard returns its own page (just the employee's shard
+        when filtering by employee) and the pages are merged; log IDs are
+        interleaved across shards, so they stay unique.
+
+        Audit rows are only appended, so log_id grows with timestamp: since
+        and until are turned into log_id bounds with one index probe each
+        and pages are read backwards on the primary key (or the action type
+        and employee indexes), never sorting the rows of the range.
+        """
+        conditions = []
+        params: Dict[str, Any] = {"limit": limit + 1}
+
+        if employee_id is not None:
+            conditions.append("employee_id = :employee_id")
+            params["employee_id"] = employee_id
+        if action_type:
+            conditions.append("action_type = :action_type")
+            params["action_type"] = action_type
+        if before is not None:
+            conditions.append("log_id < :before")
+            params["before"] = before
+
+        def page(session: Session) -> List[Any]:
+            page_conditions = list(conditions)
+            page_params = dict(params)
+            # Bounds are resolved per shard, since each has its own log_id sequence
+            if since:
+                first_log_id = session.execute(FIRST_LOG_ID_AT, {"at": since}).scalar()
+                if first_log_id is None:
+                    return []
+                page_conditions.append("log_id >= :first_log_id")
+                page_params["first_log_id"] = first_log_id
+            if until:
+                end_log_id = session.execute(FIRST_LOG_ID_AT, {"at": until}).scalar()
+                if end_log_id is not None:
+                    page_conditions.append("log_id < :end_log_id")
+                    page_params["end_log_id"] = end_log_id
+
+            sql = f"SELECT {AUDIT_COLUMNS} FROM employee_audit_log"
+            if page_conditions:
+                sql += " WHERE " + " AND ".join(page_conditions)
+            sql += " ORDER BY log_id DESC LIMIT :limit"
+            return session.execute(text(sql), page_params).all()
+
+        shards = None
+        if employee_id is not None:
+            shard = locate_employee(db, employee_id)
+            shards = [shard] if shard is not None else None
+
+        pages = fan_out(db, page, shards)
+        rows = list(islice(heapq.merge(*pages.values(), key=lambda row: row.log_id, reverse=True), limit + 1))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return {
+            "entries": [
+                {
+                    "log_id": row.log_id,
+                    "employee_id": row.employee_id,
+                    "action_type": row.action_type,
+                    "old_salary": _number(row.old_salary),
+                    "new_salary": _number(row.new_salary),
+                    "old_status": row.old_status,
+                    "new_status": row.new_status,
+                    "timestamp": row.timestamp.isoformat() if row.timestamp else None
+                }
+                for row in rows
+            ],
+            "next_cursor": rows[-1].log_id if has_more else None
+        }
+
+    @staticmethod
+    def get_salary_timeline(
+        db: Session,
+        employee_id: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Get an employee's salary changes with running totals and a summary,
+        read from the shard holding the employee (empty if there is none)
+        """
+        result = []
+        shard = locate_employee(db, employee_id)
+        if shard is not None:
+            with shard_session(db, shard) as session:
+                result = execute_prepared(
+                    session, SALARY_TIMELINE, {"emp_id": employee_id, "since": since, "until": until}
+                ).all()
+
+        timeline = [
+            {
+                "log_id": row.log_id,
+                "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+                "action_type": row.action_type,
+                "old_salary": _number(row.old_salary),
+                "new_salary": _number(row.new_salary),
+                "change": _number(row.change),
+                "change_percent": _number(row.change_percent),
+                "change_since_start": _number(row.change_since_start),
+                "peak_salary": _number(row.peak_salary),
+                "change_number": row.change_number,
+                "days_since_previous": round(float(row.days_since_previous), 1)
+                if row.days_since_previous is not None else None
+            }
+            for row in result
+        ]
+
+        changes = [entry for entry in timeline if entry["change"] is not None]
+        intervals = [entry["days_since_previous"] for entry in timeline if entry["days_since_previous"] is not None]
+        first_salary = timeline[0]["old_salary"] if timeline and timeline[0]["old_salary"] is not None \
+            else (timeline[0]["new_salary"] if timeline else None)
+        last_salary = timeline[-1]["new_salary"] if timeline else None
+
+        return {
+            "employee_id": employee_id,
+            "timeline": timeline,
+            "summary": {
+                "salary_changes": len(changes),
+                "first_salary": first_salary,
+                "last_salary": last_salary,
+                "total_change": round(last_salary - first_salary, 2) if timeline else 0,
+                "total_change_percent": round((last_salary / first_salary - 1) * 100, 2)
+                if timeline and first_salary else 0,
+                "largest_raise": max((entry["change"] for entry in changes), default=None),
+                "avg_days_between_changes": round(sum(intervals) / len(intervals), 1) if intervals else None
+            }
+        }
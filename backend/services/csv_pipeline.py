@@ -0,0 +1,296 @@
+"""
+Parallel parsing and validation pipeline for bulk employee uploads
+"""
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from datetime import date, datetime
+from typing import List, Optional, Dict, Any, Iterator, Tuple, FrozenSet, Callable, BinaryIO
+import csv
+import io
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import re
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Same pattern as the validate_employee_email trigger (sql/04_triggers.sql)
+EMAIL_PATTERN = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
+
+REQUIRED_FIELDS = ["first_name", "last_name", "email", "salary", "department_id", "date_joined"]
+VALID_STATUSES = ("active", "resigned")
+
+# employees.salary is NUMERIC(10, 2)
+MAX_SALARY = 99999999.99
+
+# Low-cardinality columns whose string values are interned in error reports
+# (department_id is only a string in CSV uploads; NDJSON/Parquet give ints)
+INTERNED_FIELDS = ("department_id", "status")
+
+# Chunks handed to each worker process; large enough to amortize pickling
+CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", 4 * 1024 * 1024))
+CSV_WORKERS = int(os.getenv("CSV_WORKERS", os.cpu_count() or 1))
+
+# Workers are started from a clean server process rather than forked from the
+# API worker, whose listener, scheduler and pool threads may hold locks
+CSV_START_METHOD = os.getenv("CSV_START_METHOD", "forkserver")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def initcap(value: str) -> str:
+    """
+    Python equivalent of PostgreSQL INITCAP as used by the format_employee_name
+    trigger: the first letter of each alphanumeric run is upper-cased and the
+    rest lower-cased.
+    """
+    characters = []
+    previous_alnum = False
+    for character in value:
+        characters.append(character.lower() if previous_alnum else character.upper())
+        previous_alnum = character.isalnum()
+    return "".join(characters)
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _error_data(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Intern the low-cardinality string values of a rejected row. Called in the
+    parent process once results are unpickled (pickling does not preserve
+    interning across chunks), so a report shares one object per distinct value.
+    """
+    for field in INTERNED_FIELDS:
+        value = row.get(field)
+        if type(value) is str:
+            row[field] = sys.intern(value)
+    return row
+
+
+def validate_row(row: Dict[str, Any], department_ids: FrozenSet[int]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Validate and normalize a single parsed row.
+    Values may be strings (CSV) or already typed (NDJSON, Parquet).
+    Returns (employee_data, None) on success or (None, error_message).
+    """
+    missing_fields = [field for field in REQUIRED_FIELDS if _is_missing(row.get(field))]
+    if missing_fields:
+        return None, f"Missing required fields: {', '.join(missing_fields)}"
+
+    try:
+        department_id = int(row["department_id"])
+        salary = float(row["salary"])
+        date_joined = row["date_joined"]
+        if isinstance(date_joined, datetime):
+            date_joined = date_joined.date()
+        elif not isinstance(date_joined, date):
+            date_joined = date.fromisoformat(str(date_joined).strip())
+    except (TypeError, ValueError) as e:
+        return None, f"Invalid data format: {str(e)}"
+
+    if department_id not in department_ids:
+        return None, f"Department with ID {department_id} not found"
+    # NaN passes both bounds and infinity cannot be stored in NUMERIC
+    if not math.isfinite(salary):
+        return None, "Salary must be a finite number"
+    if salary < 0:
+        return None, "Salary must be non-negative"
+    if salary > MAX_SALARY:
+        return None, f"Salary must not exceed {MAX_SALARY:.2f}"
+
+    # Same normalization as the format_employee_name trigger, which bulk loads skip
+    first_name = initcap(str(row["first_name"]).strip(" "))
+    last_name = initcap(str(row["last_name"]).strip(" "))
+    email = str(row["email"]).strip(" ").lower()
+    status = str(row.get("status") or "active").strip() or "active"
+
+    if not first_name or not last_name:
+        return None, "Name fields must not be blank"
+    if len(first_name) > 50 or len(last_name) > 50:
+        return None, "Name fields must be at most 50 characters"
+    if len(email) > 100 or not EMAIL_PATTERN.match(email):
+        return None, f"Invalid email format: {email}"
+    if status not in VALID_STATUSES:
+        return None, f"Invalid status: {status}"
+
+    return {
+        "first_name": first_name,
+        "last_name": last_name,
+        "email": email,
+        "salary": salary,
+        "department_id": department_id,
+        "date_joined": date_joined.isoformat(),
+        "status": status
+    }, None
+
+
+def validate_records(records: List[Dict[str, Any]], department_ids: FrozenSet[int]) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]], int]:
+    """
+    Validate a batch of already-decoded records (NDJSON lines, Parquet rows).
+    Row numbers in the result are relative to the start of the batch.
+    Returns (valid rows, errors, number of records).
+    """
+    valid = []
+    errors = []
+
+    for offset, row in enumerate(records):
+        employee_data, error = validate_row(row, department_ids)
+        if error:
+            errors.append({"row": offset, "error": error, "data": row})
+        else:
+            valid.append((offset, employee_data))
+
+    return valid, errors, len(records)
+
+
+def validate_chunk(header: List[str], chunk: bytes, department_ids: FrozenSet[int]) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]], int]:
+    """
+    Parse and validate one chunk of CSV records (without header).
+    Row numbers in the result are relative to the start of the chunk; the
+    caller rebases them once earlier chunks have been counted.
+    Returns (valid rows, errors, number of records).
+    """
+    reader = csv.DictReader(io.StringIO(chunk.decode("utf-8")), fieldnames=header)
+    return validate_records(list(reader), department_ids)
+
+
+def _record_boundary(buffer: bytes) -> int:
+    """
+    Return the offset just past the last newline in buffer that ends a CSV
+    record, or 0 if there is none. A newline only ends a record when the number
+    of quote characters before it is even, so quoted fields containing
+    newlines are never cut in half.
+    """
+    position = buffer.rfind(b"\n")
+    quotes = buffer.count(b'"', 0, position) if position != -1 else 0
+    while position != -1 and quotes % 2:
+        previous = buffer.rfind(b"\n", 0, position)
+        quotes -= buffer.count(b'"', previous + 1, position)
+        position = previous
+    return position + 1
+
+
+def split_chunks(
+    stream: BinaryIO,
+    chunk_size: int = CHUNK_SIZE,
+    boundary: Callable[[bytes], int] = _record_boundary
+) -> Iterator[bytes]:
+    """
+    Read bytes from a binary stream and yield chunks of roughly chunk_size
+    bytes that each end on a record boundary (CSV records by default; boundary
+    returns the offset to cut at, or 0 if there is none yet). Only about one
+    chunk is held in memory at a time regardless of the stream length.
+    """
+    buffer = b""
+    while True:
+        block = stream.read(chunk_size)
+        if not block:
+            break
+        buffer += block
+        if len(buffer) < chunk_size:
+            continue
+        cut = boundary(buffer)
+        if cut:
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+    if buffer:
+        yield buffer
+
+
+def iter_csv_tasks(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[Callable, tuple]]:
+    """Yield validation tasks for a CSV stream; the first line is the header"""
+    header = None
+    for chunk in split_chunks(stream, chunk_size):
+        if header is None:
+            header_end = chunk.find(b"\n")
+            if header_end == -1:
+                header_end = len(chunk)
+            header = next(csv.reader([chunk[:header_end].decode("utf-8-sig")]), [])
+            header = [column.strip() for column in header]
+            chunk = chunk[header_end + 1:]
+            if not chunk:
+                continue
+        yield validate_chunk, (header, chunk)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=CSV_WORKERS,
+                mp_context=multiprocessing.get_context(CSV_START_METHOD)
+            )
+        return _executor
+
+
+def start_executor() -> None:
+    """
+    Start the shared worker pool (called on application startup), so the
+    first upload does not wait for worker processes to start
+    """
+    if CSV_WORKERS > 1:
+        _get_executor().submit(int).result()
+
+
+def shutdown_executor() -> None:
+    """Shut down the shared worker pool (called on application shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def iter_validated_batches(
+    tasks: Iterator[Tuple[Callable, tuple]],
+    department_ids: FrozenSet[int],
+    workers: Optional[int] = None,
+    first_row: int = 2
+) -> Iterator[Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]]]]:
+    """
+    Run validation tasks (see iter_csv_tasks and services.upload_formats),
+    yielding (valid rows, errors) per task in input order. Row numbers are
+    absolute, starting at first_row (2 for CSV, where row 1 is the header).
+    Inputs that produce a single task are validated inline to avoid pool overhead.
+    """
+    workers = workers or CSV_WORKERS
+    next_row = first_row
+
+    def rebase(result):
+        nonlocal next_row
+        valid, errors, count = result
+        valid = [(next_row + offset, data) for offset, data in valid]
+        for error in errors:
+            error["row"] += next_row
+            error["data"] = _error_data(error["data"])
+        next_row += count
+        return valid, errors
+
+    tasks = iter(tasks)
+    first = next(tasks, None)
+    if first is None:
+        return
+    second = next(tasks, None)
+
+    if second is None or workers <= 1:
+        for function, payload in itertools.chain([first], [second] if second else [], tasks):
+            yield rebase(function(*payload, department_ids))
+        return
+
+    # Keep a bounded window of tasks in flight and consume them in order
+    executor = _get_executor()
+    pending = deque()
+    for function, payload in itertools.chain([first, second], tasks):
+        pending.append(executor.submit(function, *payload, department_ids))
+        if len(pending) >= workers * 2:
+            yield rebase(pending.popleft().result())
+    while pending:
+        yield rebase(pending.popleft().result())
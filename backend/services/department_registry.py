@@ -0,0 +1,184 @@
+"""
+In-process department registry shared by routes and CSV validation
+"""
+from sqlalchemy.orm import Session
+from typing import List, Optional, Dict, Any, Callable
+from models.department import Department
+import logging
+import select
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Channel raised by the trg_departments_changed trigger (sql/04_triggers.sql)
+DEPARTMENTS_CHANNEL = "departments_changed"
+
+# Seconds the listener waits before reconnecting after losing its connection
+LISTENER_RETRY_SECONDS = 5
+
+
+class DepartmentRegistry:
+    """
+    Cache of the departments table indexed by id and name.
+
+    Departments are small and rarely change, so the whole table is loaded once
+    and served from memory. The cache is dropped after local writes and when
+    PostgreSQL sends a NOTIFY on the departments channel, and is reloaded
+    lazily on the next lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        # Bumped by every invalidation, so a load that raced one is not marked current
+        self._generation = 0
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._change_callbacks: List[Callable[[], None]] = []
+
+    @staticmethod
+    def to_dict(department: Department) -> Dict[str, Any]:
+        """Convert a Department row into the cached response shape"""
+        return {
+            "department_id": department.department_id,
+            "department_name": department.department_name,
+            "location": department.location,
+            "created_at": department.created_at.isoformat() if department.created_at else None
+        }
+
+    def load(self, db: Session) -> None:
+        """
+        Load every department from the database, replacing the cache. If an
+        invalidation arrives while the query runs, the result is served but
+        not marked current, so the next lookup loads again.
+        """
+        with self._lock:
+            generation = self._generation
+        departments = [self.to_dict(d) for d in db.query(Department).all()]
+        with self._lock:
+            self._by_id = {d["department_id"]: d for d in departments}
+            self._by_name = {d["department_name"].lower(): d for d in departments}
+            self._loaded = generation == self._generation
+        logger.info(f"Loaded {len(departments)} departments into registry")
+
+    def invalidate(self) -> None:
+        """Drop the cached departments; the next lookup reloads them"""
+        with self._lock:
+            self._generation += 1
+            self._loaded = False
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.load(db)
+
+    def get(self, db: Session, department_id: int) -> Optional[Dict[str, Any]]:
+        """Get department by ID"""
+        self._ensure_loaded(db)
+        return self._by_id.get(department_id)
+
+    def get_by_name(self, db: Session, department_name: str) -> Optional[Dict[str, Any]]:
+        """Get department by name (case-insensitive)"""
+        self._ensure_loaded(db)
+        return self._by_name.get(department_name.lower())
+
+    def exists(self, db: Session, department_id: int) -> bool:
+        """Check whether a department exists"""
+        return self.get(db, department_id) is not None
+
+    def get_name(self, db: Session, department_id: int) -> Optional[str]:
+        """Get department name for an ID, for joining into responses"""
+        department = self.get(db, department_id)
+        return department["department_name"] if department else None
+
+    def all(self, db: Session) -> List[Dict[str, Any]]:
+        """Get all departments ordered by ID"""
+        self._ensure_loaded(db)
+        return [self._by_id[k] for k in sorted(self._by_id)]
+
+    def on_change(self, callback: Callable[[], None]) -> None:
+        """
+        Call callback from the listener thread whenever the database reports
+        a department change, and after reconnecting (changes may have been
+        missed while disconnected)
+        """
+        self._change_callbacks.append(callback)
+
+    def _changed(self) -> None:
+        self.invalidate()
+        for callback in self._change_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Department change callback failed: {e}")
+
+    def start_listener(self, engine) -> None:
+        """
+        Start a background thread that LISTENs for department changes made by
+        other workers or directly in the database and invalidates the cache.
+        The thread reconnects by itself if its connection is lost.
+        """
+        if self._listener and self._listener.is_alive():
+            return
+
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self._listen,
+            args=(engine,),
+            name="department-registry-listener",
+            daemon=True
+        )
+        self._listener.start()
+
+    @staticmethod
+    def _connect(engine):
+        raw_connection = engine.raw_connection()
+        # Keep this connection out of the pool for the lifetime of the listener
+        raw_connection.detach()
+        connection = raw_connection.dbapi_connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {DEPARTMENTS_CHANNEL}")
+        return connection
+
+    def _listen(self, engine) -> None:
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self._connect(engine)
+                # Changes made while no connection was listening were missed
+                self._changed()
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 5.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    if connection.notifies:
+                        connection.notifies.clear()
+                        self._changed()
+                        logger.info("Department registry invalidated by database notification")
+            except Exception as e:
+                logger.error(f"Department change listener lost its connection, retrying in {LISTENER_RETRY_SECONDS}s: {e}")
+                self.invalidate()
+                self._stop.wait(LISTENER_RETRY_SECONDS)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def stop_listener(self) -> None:
+        """Stop the background LISTEN thread"""
+        self._stop.set()
+        if self._listener:
+            self._listener.join(timeout=10)
+            self._listener = None
+
+
+department_registry = DepartmentRegistry()
+
+
+def get_department_registry() -> DepartmentRegistry:
+    """Dependency function to get the shared department registry"""
+    return department_registry
@@ -2,33 +2,172 @@
 Employee service layer for business logic
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, text, insert, update, delete, select
+from sqlalchemy.exc import DBAPIError
 from typing import List, Optional, Dict, Any
+from database import shard_router
 from models.employee import Employee
 from models.department import Department
 from models.audit_log import EmployeeAuditLog
+from models.employee_record import EmployeeRecord
+from services.prepared_statements import register_statement, execute_prepared
+from services.sharding import fan_out, shard_session, department_session, locate_employee, group_by_shard
+import heapq
+import itertools
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Columns returned by reads and single-statement writes, in EmployeeRecord order;
+# records survive commit without the expire-and-refresh round trip of ORM instances
+EMPLOYEE_COLUMNS = tuple(Employee.__table__.columns)
+
+EMPLOYEE_BY_ID = register_statement(
+    "employee_by_id",
+    f"SELECT {', '.join(column.name for column in EMPLOYEE_COLUMNS)} FROM employees WHERE employee_id = :employee_id",
+    {"employee_id": "integer"}
+)
+
+
+def _to_record(row) -> Optional[EmployeeRecord]:
+    return EmployeeRecord.from_row(row) if row else None
+
+
+def _existing_emails(db: Session, emails: List[str]) -> set:
+    """Emails already stored on any shard"""
+    query = text("SELECT email FROM employees WHERE email = ANY(:emails)")
+    found = fan_out(db, lambda session: set(session.execute(query, {"emails": emails}).scalars()))
+    return set().union(*found.values())
+
+
+def _per_shard(db: Session, employees_data: List[Dict[str, Any]], load) -> List[Dict[str, Any]]:
+    """
+    Run load(session, rows) for the rows of each shard and return the
+    per-row results in input order
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(employees_data)
+    for shard, indexes in group_by_shard(employees_data, lambda data: int(data["department_id"])).items():
+        with shard_session(db, shard) as session:
+            shard_results = load(session, [employees_data[index] for index in indexes])
+        for index, result in zip(indexes, shard_results):
+            results[index] = result
+    return results
+
 
 class EmployeeService:
-    """Service class for employee operations"""
+    """
+    Service class for employee operations.
+
+    Employees are stored on the shard of their department (database.ShardRouter).
+    Writes go to that shard, lookups by ID probe all shards concurrently and
+    listings merge per-shard pages. Without sharding every call runs on db.
+    """
 
     @staticmethod
-    def create_employee(db: Session, employee_data: Dict[str, Any]) -> Employee:
-        """Create a new employee"""
-        employee = Employee(**employee_data)
-        db.add(employee)
-        db.commit()
-        db.refresh(employee)
+    def create_employee(db: Session, employee_data: Dict[str, Any]) -> EmployeeRecord:
+        """Create a new employee with a single INSERT ... RETURNING"""
+        if shard_router.sharded and _existing_emails(db, [employee_data["email"]]):
+            # Each shard only enforces email uniqueness for its own rows
+            raise ValueError(f"Employee with email {employee_data['email']} already exists")
+
+        with department_session(db, employee_data["department_id"]) as session:
+            employee = session.execute(
+                insert(Employee).values(**employee_data).returning(*EMPLOYEE_COLUMNS)
+            ).first()
+            session.commit()
         logger.info(f"Created employee: {employee.employee_id}")
-        return employee
+        return _to_record(employee)
 
     @staticmethod
-    def get_employee(db: Session, employee_id: int) -> Optional[Employee]:
-        """Get employee by ID"""
-        return db.query(Employee).filter(Employee.employee_id == employee_id).first()
+    def bulk_insert_employees(db: Session, employees_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert a batch of employees in one round trip per shard using the
+        bulk_insert_employees stored function. Returns one result per input row,
+        in input order, with success and error_message fields.
+        """
+        if not employees_data:
+            return []
+
+        def load(session: Session, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            query = text("SELECT * FROM bulk_insert_employees(CAST(:emp_data AS JSONB))")
+            result = [dict(row._mapping) for row in session.execute(query, {"emp_data": json.dumps(rows)})]
+            session.commit()
+            return result
+
+        rows = _per_shard(db, employees_data, load)
+        logger.info(f"Bulk inserted {sum(1 for row in rows if row['success'])}/{len(rows)} employees")
+        return rows
+
+    @staticmethod
+    def bulk_load_employees(db: Session, employees_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Load a batch of rows already normalized and validated by
+        services.csv_pipeline. Rows whose email is duplicated in the batch or
+        already stored (on any shard) are rejected up front; the rest go through
+        the set-based bulk_insert_validated_employees function in one statement
+        per shard. If that still fails (e.g. a concurrent insert), the shard's
+        rows are retried through the row-by-row bulk_insert_employees function.
+        Returns one result per input row, in input order.
+        """
+        if not employees_data:
+            return []
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(employees_data)
+        existing = _existing_emails(db, [data["email"] for data in employees_data])
+
+        seen = set()
+        pending = []
+        for index, data in enumerate(employees_data):
+            email = data["email"]
+            if email in existing:
+                error = f"Employee with email {email} already exists"
+            elif email in seen:
+                error = f"Duplicate email {email} in upload"
+            else:
+                seen.add(email)
+                pending.append(index)
+                continue
+            results[index] = {"employee_id": None, "success": False, "error_message": error}
+
+        def load(session: Session, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            try:
+                inserted = dict(
+                    (row.email, row.employee_id) for row in session.execute(
+                        text("SELECT * FROM bulk_insert_validated_employees(CAST(:emp_data AS JSONB))"),
+                        {"emp_data": json.dumps(rows)}
+                    )
+                )
+                session.commit()
+                return [
+                    {"employee_id": inserted.get(data["email"]), "success": True, "error_message": None}
+                    for data in rows
+                ]
+            except DBAPIError as e:
+                session.rollback()
+                logger.warning(f"Fast bulk insert failed, retrying row by row: {e.orig}")
+                result = [dict(row._mapping) for row in session.execute(
+                    text("SELECT * FROM bulk_insert_employees(CAST(:emp_data AS JSONB))"),
+                    {"emp_data": json.dumps(rows)}
+                )]
+                session.commit()
+                return result
+
+        if pending:
+            pending_data = [employees_data[index] for index in pending]
+            for index, row in zip(pending, _per_shard(db, pending_data, load)):
+                results[index] = row
+
+        logger.info(f"Bulk loaded {sum(1 for row in results if row['success'])}/{len(results)} employees")
+        return results
+
+    @staticmethod
+    def get_employee(db: Session, employee_id: int) -> Optional[EmployeeRecord]:
+        """Get employee by ID (columns only, no ORM instance state)"""
+        found = fan_out(db, lambda session: _to_record(
+            execute_prepared(session, EMPLOYEE_BY_ID, {"employee_id": employee_id}).first()
+        ))
+        return next((record for record in found.values() if record), None)
 
     @staticmethod
     def get_all_employees(
@@ -37,89 +176,152 @@ class EmployeeService:
         limit: int = 100,
         status: Optional[str] = None,
         department_id: Optional[int] = None
-    ) -> List[Employee]:
-        """Get all employees with optional filters"""
-        query = db.query(Employee)
+    ) -> List[EmployeeRecord]:
+        """
+        Get all employees with optional filters, as compact read-only records
+        ordered by ID. Across shards each shard returns its first skip + limit
+        rows and the pages are merged, so deep pages cost more when sharded.
+        """
+        query = select(*EMPLOYEE_COLUMNS).order_by(Employee.employee_id)
         
         if status:
-            query = query.filter(Employee.status == status)
+            query = query.where(Employee.status == status)
         if department_id:
-            query = query.filter(Employee.department_id == department_id)
+            query = query.where(Employee.department_id == department_id)
+            with department_session(db, department_id) as session:
+                result = session.execute(query.offset(skip).limit(limit))
+                return [EmployeeRecord.from_row(row) for row in result]
+        
+        if not shard_router.sharded:
+            result = db.execute(query.offset(skip).limit(limit))
+            return [EmployeeRecord.from_row(row) for row in result]
         
-        return query.offset(skip).limit(limit).all()
+        pages = fan_out(db, lambda session: [
+            EmployeeRecord.from_row(row) for row in session.execute(query.limit(skip + limit))
+        ])
+        merged = heapq.merge(*pages.values(), key=lambda record: record.employee_id)
+        return list(itertools.islice(merged, skip, skip + limit))
 
     @staticmethod
-    def update_employee(db: Session, employee_id: int, update_data: Dict[str, Any]) -> Optional[Employee]:
-        """Update employee information"""
-        employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
-        if not employee:
-            return None
+    def update_employee(db: Session, employee_id: int, update_data: Dict[str, Any]) -> Optional[EmployeeRecord]:
+        """
+        Update employee information with a single UPDATE ... RETURNING.
+        Returned values reflect the BEFORE UPDATE triggers (name formatting).
+        Moving an employee to a department on another shard is rejected.
+        """
+        if not update_data:
+            return EmployeeService.get_employee(db, employee_id)
         
-        for key, value in update_data.items():
-            setattr(employee, key, value)
+        shard = locate_employee(db, employee_id)
+        if shard is None:
+            return None
+        if update_data.get("department_id") is not None and \
+                shard_router.shard_for_department(update_data["department_id"]) != shard:
+            raise ValueError("Moving an employee to a department on another shard is not supported")
         
-        db.commit()
-        db.refresh(employee)
+        with shard_session(db, shard) as session:
+            employee = session.execute(
+                update(Employee)
+                .where(Employee.employee_id == employee_id)
+                .values(**update_data)
+                .returning(*EMPLOYEE_COLUMNS)
+            ).first()
+            if not employee:
+                session.rollback()
+                return None
+            
+            session.commit()
         logger.info(f"Updated employee: {employee_id}")
-        return employee
+        return _to_record(employee)
 
     @staticmethod
     def delete_employee(db: Session, employee_id: int) -> bool:
-        """Delete (resign) an employee"""
-        employee = db.query(Employee).filter(Employee.employee_id == employee_id).first()
-        if not employee:
+        """
+        Delete (resign) an employee with a single DELETE ... RETURNING.
+        Audit log and performance rows are removed by ON DELETE CASCADE in the
+        database rather than loaded and deleted one by one by the ORM.
+        """
+        shard = locate_employee(db, employee_id)
+        if shard is None:
             return False
         
-        db.delete(employee)
-        db.commit()
+        with shard_session(db, shard) as session:
+            deleted_id = session.execute(
+                delete(Employee)
+                .where(Employee.employee_id == employee_id)
+                .returning(Employee.employee_id)
+            ).scalar()
+            if deleted_id is None:
+                session.rollback()
+                return False
+            
+            session.commit()
         logger.info(f"Deleted employee: {employee_id}")
         return True
 
     @staticmethod
-    def increment_salary(db: Session, employee_id: int, increment: float) -> Optional[Employee]:
+    def increment_salary(db: Session, employee_id: int, increment: float) -> Optional[EmployeeRecord]:
         """Increment employee salary using stored function"""
-        try:
-            # Call stored function
-            db.execute(
-                "SELECT update_salary(:emp_id, :increment)",
-                {"emp_id": employee_id, "increment": increment}
-            )
-            db.commit()
-            
-            # Return updated employee
-            return db.query(Employee).filter(Employee.employee_id == employee_id).first()
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Error incrementing salary: {e}")
-            raise
+        shard = locate_employee(db, employee_id)
+        if shard is None:
+            return None
+        
+        with shard_session(db, shard) as session:
+            try:
+                # Call stored function
+                session.execute(
+                    text("SELECT update_salary(:emp_id, :increment)"),
+                    {"emp_id": employee_id, "increment": increment}
+                )
+                
+                # Read the updated employee in the same transaction, then commit
+                employee = _to_record(execute_prepared(session, EMPLOYEE_BY_ID, {"employee_id": employee_id}).first())
+                session.commit()
+                return employee
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Error incrementing salary: {e}")
+                raise
 
     @staticmethod
     def get_employee_count(db: Session, status: Optional[str] = None) -> int:
-        """Get total employee count"""
-        query = db.query(Employee)
-        if status:
-            query = query.filter(Employee.status == status)
-        return query.count()
+        """Get total employee count, summed over shards"""
+        def count(session: Session) -> int:
+            query = session.query(func.count(Employee.employee_id))
+            if status:
+                query = query.filter(Employee.status == status)
+            return query.scalar()
+        
+        return sum(fan_out(db, count).values())
 
     @staticmethod
     def get_salary_statistics(db: Session, department_id: Optional[int] = None) -> Dict[str, Any]:
-        """Get salary statistics"""
-        query = db.query(
-            func.avg(Employee.salary).label('avg_salary'),
-            func.max(Employee.salary).label('max_salary'),
-            func.min(Employee.salary).label('min_salary'),
-            func.sum(Employee.salary).label('total_salary')
-        ).filter(Employee.status == 'active')
-        
-        if department_id:
-            query = query.filter(Employee.department_id == department_id)
-        
-        result = query.first()
-        
+        """
+        Get salary statistics of active employees, merged from per-shard
+        count, sum, max and min (only the department's shard when given)
+        """
+        def partial(session: Session):
+            query = session.query(
+                func.count(Employee.salary).label('salary_count'),
+                func.sum(Employee.salary).label('total_salary'),
+                func.max(Employee.salary).label('max_salary'),
+                func.min(Employee.salary).label('min_salary')
+            ).filter(Employee.status == 'active')
+            if department_id is not None:
+                query = query.filter(Employee.department_id == department_id)
+            return query.first()
+
+        shards = [shard_router.shard_for_department(department_id)] if department_id is not None else None
+        partials = list(fan_out(db, partial, shards).values())
+
+        salary_count = sum(p.salary_count for p in partials)
+        total_salary = sum(p.total_salary or 0 for p in partials)
+        max_values = [p.max_salary for p in partials if p.max_salary is not None]
+        min_values = [p.min_salary for p in partials if p.min_salary is not None]
+
         return {
-            "avg_salary": float(result.avg_salary) if result.avg_salary else 0,
-            "max_salary": float(result.max_salary) if result.max_salary else 0,
-            "min_salary": float(result.min_salary) if result.min_salary else 0,
-            "total_salary": float(result.total_salary) if result.total_salary else 0
+            "avg_salary": float(total_salary / salary_count) if salary_count else 0,
+            "max_salary": float(max(max_values)) if max_values else 0,
+            "min_salary": float(min(min_values)) if min_values else 0,
+            "total_salary": float(total_salary) if total_salary else 0
         }
-
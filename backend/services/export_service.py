@@ -0,0 +1,243 @@
+"""
+Bulk export service writing Arrow IPC streams and Parquet files
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import List, Optional, Dict, Any, Iterator, BinaryIO
+from datetime import datetime
+from database import shard_router
+from services.sharding import shard_session
+import io
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor per record batch
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", 100000))
+
+EXPORT_FORMATS = ("parquet", "arrow")
+
+# Per table: selected columns, the column used for time range filters and the
+# sort key. Department/status filters on child tables join through employees.
+EXPORT_TABLES = {
+    "employees": {
+        "columns": ["employee_id", "first_name", "last_name", "email", "salary",
+                    "department_id", "date_joined", "last_updated", "status"],
+        "time_column": "date_joined",
+        "order_by": "employee_id"
+    },
+    "employee_audit_log": {
+        "columns": ["log_id", "employee_id", "action_type", "old_salary", "new_salary",
+                    "old_status", "new_status", "timestamp"],
+        "time_column": "timestamp",
+        "order_by": "log_id"
+    },
+    "performance_data": {
+        "columns": ["performance_id", "employee_id", "rating_year", "rating_value", "created_at"],
+        "time_column": "created_at",
+        "order_by": "performance_id"
+    }
+}
+
+
+def _arrow_schema(table: str):
+    """Arrow schema per table, keeping NUMERIC as decimal and DATE as date32"""
+    import pyarrow as pa
+
+    schemas = {
+        "employees": pa.schema([
+            ("employee_id", pa.int32()),
+            ("first_name", pa.string()),
+            ("last_name", pa.string()),
+            ("email", pa.string()),
+            ("salary", pa.decimal128(10, 2)),
+            ("department_id", pa.int32()),
+            ("date_joined", pa.date32()),
+            ("last_updated", pa.timestamp("us")),
+            ("status", pa.string())
+        ]),
+        "employee_audit_log": pa.schema([
+            ("log_id", pa.int32()),
+            ("employee_id", pa.int32()),
+            ("action_type", pa.string()),
+            ("old_salary", pa.decimal128(10, 2)),
+            ("new_salary", pa.decimal128(10, 2)),
+            ("old_status", pa.string()),
+            ("new_status", pa.string()),
+            ("timestamp", pa.timestamp("us"))
+        ]),
+        "performance_data": pa.schema([
+            ("performance_id", pa.int32()),
+            ("employee_id", pa.int32()),
+            ("rating_year", pa.int32()),
+            ("rating_value", pa.decimal128(3, 1)),
+            ("created_at", pa.timestamp("us"))
+        ])
+    }
+    return schemas[table]
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only sink that hands written bytes back in chunks. It keeps counting
+    the absolute position after draining, which the Parquet writer relies on
+    for footer offsets.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ExportService:
+    """Service class for bulk exports"""
+
+    @staticmethod
+    def build_query(
+        table: str,
+        department_id: Optional[int] = None,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ):
+        """Build the filtered SELECT for a table; returns (query, params)"""
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown export table: {table}. Choose from {', '.join(EXPORT_TABLES)}")
+
+        spec = EXPORT_TABLES[table]
+        columns = ", ".join(f't."{column}"' for column in spec["columns"])
+        sql = f"SELECT {columns} FROM {table} t"
+        conditions = []
+        params: Dict[str, Any] = {}
+
+        if table != "employees" and (department_id is not None or status):
+            sql += " JOIN employees e ON e.employee_id = t.employee_id"
+            filter_alias = "e"
+        else:
+            filter_alias = "t"
+
+        if department_id is not None:
+            conditions.append(f"{filter_alias}.department_id = :department_id")
+            params["department_id"] = department_id
+        if status:
+            conditions.append(f"{filter_alias}.status = :status")
+            params["status"] = status
+        if since:
+            conditions.append(f't."{spec["time_column"]}" >= :since')
+            params["since"] = since
+        if until:
+            conditions.append(f't."{spec["time_column"]}" < :until')
+            params["until"] = until
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY t.{spec['order_by']}"
+        return text(sql), params
+
+    @staticmethod
+    def iter_record_batches(
+        db: Session,
+        table: str,
+        batch_rows: int = EXPORT_BATCH_ROWS,
+        **filters
+    ) -> Iterator[Any]:
+        """
+        Yield pyarrow RecordBatches read from a server-side cursor, so only one
+        batch of rows is held in memory at a time. With shards, they are read
+        one after another (only the department's shard when filtering by
+        department), so rows are sorted within each shard.
+        """
+        import pyarrow as pa
+
+        query, params = ExportService.build_query(table, **filters)
+        schema = _arrow_schema(table)
+        department_id = filters.get("department_id")
+        shards = [shard_router.shard_for_department(department_id)] if department_id is not None else shard_router.names
+
+        for shard in shards:
+            with shard_session(db, shard) as session:
+                result = session.execute(query, params, execution_options={"yield_per": batch_rows})
+                for rows in result.partitions(batch_rows):
+                    columns = list(zip(*rows))
+                    yield pa.RecordBatch.from_arrays(
+                        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                        schema=schema
+                    )
+
+    @staticmethod
+    def _open_writer(sink: BinaryIO, table: str, export_format: str):
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}. Choose from {', '.join(EXPORT_FORMATS)}")
+
+        schema = _arrow_schema(table)
+        if export_format == "arrow":
+            return ipc.new_stream(sink, schema)
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+
+    @staticmethod
+    def write(
+        db: Session,
+        sink: BinaryIO,
+        table: str,
+        export_format: str = "parquet",
+        batch_rows: int = EXPORT_BATCH_ROWS,
+        **filters
+    ) -> int:
+        """Write a full export to a file-like sink; returns the number of rows"""
+        writer = ExportService._open_writer(sink, table, export_format)
+        rows = 0
+        for batch in ExportService.iter_record_batches(db, table, batch_rows, **filters):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+        writer.close()
+        logger.info(f"Exported {rows} rows from {table} as {export_format}")
+        return rows
+
+    @staticmethod
+    def iter_bytes(
+        db: Session,
+        table: str,
+        export_format: str = "parquet",
+        batch_rows: int = EXPORT_BATCH_ROWS,
+        **filters
+    ) -> Iterator[bytes]:
+        """
+        Encode an export as Arrow IPC stream or Parquet, yielding the encoded
+        bytes after every record batch (for streaming responses).
+        """
+        sink = _ChunkSink()
+        writer = ExportService._open_writer(sink, table, export_format)
+
+        rows = 0
+        for batch in ExportService.iter_record_batches(db, table, batch_rows, **filters):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+            data = sink.drain()
+            if data:
+                yield data
+
+        writer.close()
+        data = sink.drain()
+        if data:
+            yield data
+        logger.info(f"Exported {rows} rows from {table} as {export_format}")
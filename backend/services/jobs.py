@@ -0,0 +1,51 @@
+"""
+Scheduled jobs registered with the in-process scheduler
+"""
+from database import engine, SessionLocal
+from services.scheduler import Scheduler
+from services.analytics_service import AnalyticsService
+from services.department_registry import department_registry
+import os
+
+SNAPSHOT_SCHEDULE = os.getenv("SNAPSHOT_SCHEDULE", "15 0 * * *")
+REGISTRY_WARMUP_SCHEDULE = os.getenv("REGISTRY_WARMUP_SCHEDULE", "*/10 * * * *")
+AUDIT_RETENTION_SCHEDULE = os.getenv("AUDIT_RETENTION_SCHEDULE", "30 2 * * *")
+# Audit log retention is off unless a number of days is configured
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", 0))
+JOB_RUN_RETENTION_SCHEDULE = os.getenv("JOB_RUN_RETENTION_SCHEDULE", "45 2 * * *")
+JOB_RUN_RETENTION_DAYS = int(os.getenv("JOB_RUN_RETENTION_DAYS", 30))
+
+scheduler = Scheduler(engine, SessionLocal)
+
+
+def register_jobs() -> None:
+    """Register the default maintenance and analytics jobs"""
+    scheduler.add_job(
+        "department_snapshots",
+        SNAPSHOT_SCHEDULE,
+        lambda db: AnalyticsService.refresh_department_snapshots(db)
+    )
+    # Runs in every worker since each has its own in-memory registry
+    scheduler.add_job(
+        "department_registry_warmup",
+        REGISTRY_WARMUP_SCHEDULE,
+        department_registry.load,
+        exclusive=False
+    )
+    if AUDIT_RETENTION_DAYS > 0:
+        scheduler.add_job(
+            "audit_log_retention",
+            AUDIT_RETENTION_SCHEDULE,
+            lambda db: AnalyticsService.purge_audit_log(db, AUDIT_RETENTION_DAYS)
+        )
+    if JOB_RUN_RETENTION_DAYS > 0:
+        scheduler.add_job(
+            "job_run_retention",
+            JOB_RUN_RETENTION_SCHEDULE,
+            lambda db: Scheduler.purge_runs(db, JOB_RUN_RETENTION_DAYS)
+        )
+
+
+def get_scheduler() -> Scheduler:
+    """Dependency function to get the application scheduler"""
+    return scheduler
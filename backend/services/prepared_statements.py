@@ -0,0 +1,122 @@
+"""
+Registry of server-side prepared statements for hot read queries
+"""
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Matches :name bind parameters but not ::type casts
+_BIND_PARAM = re.compile(r"(?<!:):(\w+)")
+
+# A statement that could not be prepared on a connection is retried on use after this long
+PREPARE_RETRY_SECONDS = float(os.getenv("PREPARE_RETRY_SECONDS", 30))
+
+
+class PreparedStatement:
+    """
+    A named query that is PREPAREd once on every pooled connection and then
+    run with EXECUTE, so PostgreSQL can reuse its plan instead of re-planning
+    the query on each request.
+    """
+
+    def __init__(self, name: str, sql: str, param_types: Dict[str, str]):
+        self.name = name
+        self.sql = sql
+        self.params: List[str] = list(dict.fromkeys(_BIND_PARAM.findall(sql)))
+        missing = [param for param in self.params if param not in param_types]
+        if missing:
+            raise ValueError(f"Prepared statement {name} has no type for: {', '.join(missing)}")
+        self.param_types = [param_types[param] for param in self.params]
+
+        positions = {param: index + 1 for index, param in enumerate(self.params)}
+        self.prepare_sql = f"PREPARE {name}" + (f" ({', '.join(self.param_types)})" if self.params else "") + \
+            " AS " + _BIND_PARAM.sub(lambda match: f"${positions[match.group(1)]}", sql)
+        self.execute_sql = text(
+            f"EXECUTE {name}" + (f"({', '.join(':' + param for param in self.params)})" if self.params else "")
+        )
+        self.fallback_sql = text(sql)
+
+
+PREPARED_STATEMENTS: Dict[str, PreparedStatement] = {}
+
+
+def register_statement(name: str, sql: str, param_types: Dict[str, str] = None) -> PreparedStatement:
+    """
+    Register a query to be prepared on each new connection.
+    sql uses :name bind parameters; param_types maps them to PostgreSQL types.
+    """
+    statement = PreparedStatement(name, sql, param_types or {})
+    PREPARED_STATEMENTS[name] = statement
+    return statement
+
+
+def prepare_connection(dbapi_connection, connection_record) -> None:
+    """Pool connect event: PREPARE every registered statement on a new connection"""
+    prepared = set()
+    cursor = dbapi_connection.cursor()
+    try:
+        for statement in PREPARED_STATEMENTS.values():
+            try:
+                cursor.execute(statement.prepare_sql)
+                dbapi_connection.commit()
+                prepared.add(statement.name)
+            except Exception as e:
+                # e.g. schema not created yet; retried when the statement is first used
+                dbapi_connection.rollback()
+                logger.warning(f"Could not prepare statement {statement.name}: {e}")
+    finally:
+        cursor.close()
+    connection_record.info["prepared_statements"] = prepared
+    connection_record.info["prepare_failed"] = {}
+
+
+def install(engine) -> None:
+    """Prepare registered statements on every connection the engine's pool opens"""
+    if not event.contains(engine, "connect", prepare_connection):
+        event.listen(engine, "connect", prepare_connection)
+
+
+def _prepare_lazily(db: Session, statement: PreparedStatement, info: Dict[str, Any]) -> bool:
+    """
+    PREPARE a statement the connect event could not prepare, inside a
+    savepoint so a failure leaves the caller's transaction usable. Failed
+    attempts are retried at most every PREPARE_RETRY_SECONDS per connection.
+    """
+    failed = info.setdefault("prepare_failed", {})
+    if time.monotonic() - failed.get(statement.name, float("-inf")) < PREPARE_RETRY_SECONDS:
+        return False
+    try:
+        with db.begin_nested():
+            cursor = db.connection().connection.cursor()
+            try:
+                cursor.execute(statement.prepare_sql)
+            finally:
+                cursor.close()
+    except Exception as e:
+        failed[statement.name] = time.monotonic()
+        logger.warning(f"Could not prepare statement {statement.name}: {e}")
+        return False
+    # Prepared statements belong to the database session, so they outlive the transaction
+    failed.pop(statement.name, None)
+    info["prepared_statements"].add(statement.name)
+    return True
+
+
+def execute_prepared(db: Session, statement: PreparedStatement, params: Dict[str, Any] = None):
+    """
+    Run a registered statement by name on the session's connection. If the
+    connection could not prepare it when it was opened (e.g. before the schema
+    existed), the PREPARE is retried here; until it succeeds the plain query runs.
+    """
+    info = db.connection().info
+    prepared = info.get("prepared_statements")
+    # Connections of engines without install() have no prepared statements at all
+    if prepared is not None and (statement.name in prepared or _prepare_lazily(db, statement, info)):
+        return db.execute(statement.execute_sql, params or {})
+    return db.execute(statement.fallback_sql, params or {})
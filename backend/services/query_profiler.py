@@ -0,0 +1,218 @@
+"""
+Opt-in per-request SQL profiling with N+1 detection
+"""
+from collections import deque
+from contextvars import ContextVar
+from sqlalchemy import event
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# off: never profile; header: profile requests sending PROFILE_HEADER; all: profile every request
+QUERY_PROFILING = os.getenv("QUERY_PROFILING", "header").lower()
+PROFILING_MODES = ("off", "header", "all")
+
+PROFILE_HEADER = "x-profile-queries"
+
+# A SELECT repeated this many times within one request is reported as a probable N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))
+
+# Completed request profiles kept for the /admin/profiles endpoint
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", 100))
+
+# Response headers carrying the summary
+PROFILE_RESPONSE_HEADERS = ["X-Query-Count", "X-Query-Time-Ms", "X-Query-N-Plus-One"]
+
+# psycopg2 pyformat placeholders as they reach the cursor
+_BIND_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a SQL statement so that executions differing only in parameter
+    values, literals or IN-list length share one fingerprint.
+    """
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _BIND_PLACEHOLDER.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("?...", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class RequestProfile:
+    """Queries executed while serving one request"""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.query_count = 0
+        self.db_time_ms = 0.0
+        # fingerprint -> [executions, total milliseconds]
+        self.statements: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        key = fingerprint(statement)
+        with self._lock:
+            self.query_count += 1
+            self.db_time_ms += elapsed_ms
+            entry = self.statements.setdefault(key, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed_ms
+
+    def finish(self, status_code: Optional[int]) -> None:
+        self.status_code = status_code
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 1)
+
+    def n_plus_one(self) -> List[Dict[str, Any]]:
+        """Repeated SELECT fingerprints, the usual sign of per-row lazy loads or lookups"""
+        with self._lock:
+            return [
+                {"statement": statement, "count": int(count), "total_ms": round(total_ms, 2)}
+                for statement, (count, total_ms) in sorted(self.statements.items(), key=lambda item: -item[1][0])
+                if count >= N_PLUS_ONE_THRESHOLD and statement.upper().startswith(("SELECT", "WITH"))
+            ]
+
+    def to_dict(self, top: int = 10) -> Dict[str, Any]:
+        """Summary for the admin endpoint"""
+        with self._lock:
+            slowest = sorted(self.statements.items(), key=lambda item: -item[1][1])[:top]
+            summary = {
+                "method": self.method,
+                "path": self.path,
+                "started_at": self.started_at.isoformat(),
+                "status_code": self.status_code,
+                "duration_ms": self.duration_ms,
+                "query_count": self.query_count,
+                "distinct_statements": len(self.statements),
+                "db_time_ms": round(self.db_time_ms, 2),
+                "top_statements": [
+                    {"statement": statement, "count": int(count), "total_ms": round(total_ms, 2)}
+                    for statement, (count, total_ms) in slowest
+                ]
+            }
+        summary["n_plus_one"] = self.n_plus_one()
+        return summary
+
+    def headers(self) -> List[tuple]:
+        """Summary as raw ASGI response headers"""
+        return [
+            (b"x-query-count", str(self.query_count).encode()),
+            (b"x-query-time-ms", f"{self.db_time_ms:.2f}".encode()),
+            (b"x-query-n-plus-one", str(len(self.n_plus_one())).encode())
+        ]
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+_history: deque = deque(maxlen=PROFILE_HISTORY)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append((context, time.perf_counter()))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is None:
+        return
+    starts = conn.info.get("profile_query_start")
+    if starts:
+        profile.record(statement, (time.perf_counter() - starts.pop()[1]) * 1000)
+
+
+def _handle_error(exception_context):
+    """
+    A failed statement never reaches after_cursor_execute; drop its start
+    time so it does not inflate the next statement timed on the connection
+    """
+    connection = exception_context.connection
+    starts = connection.info.get("profile_query_start") if connection is not None else None
+    if starts and starts[-1][0] is exception_context.execution_context:
+        starts.pop()
+
+
+def install(engine) -> None:
+    """Attach the cursor listeners; they only record while a request is being profiled"""
+    if QUERY_PROFILING not in PROFILING_MODES:
+        raise ValueError(f"QUERY_PROFILING must be one of {', '.join(PROFILING_MODES)}")
+    if QUERY_PROFILING == "off":
+        return
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def recent_profiles(limit: int = 20, n_plus_one_only: bool = False) -> List[Dict[str, Any]]:
+    """Most recent completed request profiles in this process, newest first"""
+    profiles = [profile.to_dict() for profile in reversed(list(_history))]
+    if n_plus_one_only:
+        profiles = [profile for profile in profiles if profile["n_plus_one"]]
+    return profiles[:limit]
+
+
+class QueryProfilingMiddleware:
+    """
+    ASGI middleware profiling requests when QUERY_PROFILING is "all", or when
+    it is "header" and the request sends X-Profile-Queries: 1.
+
+    The summary is added as X-Query-* response headers (covering the queries
+    run before the response started, so streamed bodies may run more) and the
+    complete profile is kept for /admin/profiles once the body has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _enabled(self, scope) -> bool:
+        if QUERY_PROFILING == "all":
+            return True
+        if QUERY_PROFILING == "header":
+            for name, value in scope.get("headers", ()):
+                if name == PROFILE_HEADER.encode():
+                    return value.decode().lower() in ("1", "true", "yes")
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._enabled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"])
+        token = _current_profile.set(profile)
+        status_code = None
+
+        async def send_with_profile(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": list(message.get("headers", [])) + profile.headers()}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            _current_profile.reset(token)
+            profile.finish(status_code)
+            _history.append(profile)
+            flagged = profile.n_plus_one()
+            if flagged:
+                logger.warning(
+                    f"Probable N+1 in {profile.method} {profile.path}: "
+                    f"{flagged[0]['count']}x {flagged[0]['statement'][:200]}"
+                )
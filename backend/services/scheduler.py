@@ -0,0 +1,348 @@
+"""
+Lightweight in-process job scheduler for analytics refreshes and maintenance
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from typing import List, Optional, Dict, Any, Callable, Set
+import logging
+import os
+import threading
+import time
+import traceback
+import zlib
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", 2))
+
+
+class CronSchedule:
+    """
+    Standard five-field cron expression: minute hour day-of-month month day-of-week.
+    Supports *, lists (1,2), ranges (1-5) and steps (*/15, 0-30/5).
+    Day-of-week uses 0 or 7 for Sunday.
+    """
+
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELD_RANGES)
+        ]
+        if 7 in self.weekdays:
+            self.weekdays = (self.weekdays - {7}) | {0}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in field.split(","):
+            value_range, _, step = part.partition("/")
+            step = int(step) if step else 1
+            if value_range == "*":
+                start, end = low, high
+            elif "-" in value_range:
+                start, end = (int(v) for v in value_range.split("-", 1))
+            else:
+                start = end = int(value_range)
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron field: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def matches(self, moment: datetime) -> bool:
+        """Check whether the schedule fires at the given minute"""
+        if moment.minute not in self.minutes or moment.hour not in self.hours:
+            return False
+        if moment.month not in self.months:
+            return False
+        day_match = moment.day in self.days
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        # Like cron: when both day fields are restricted, either may match
+        if self._any_day or self._any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def next_after(self, moment: datetime) -> Optional[datetime]:
+        """Return the next firing time strictly after the given moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Four years covers schedules that only fire on February 29
+        limit = candidate + timedelta(days=4 * 366)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if candidate.hour not in self.hours or not self.matches(candidate.replace(minute=min(self.minutes))):
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if self.matches(candidate):
+                return candidate
+            candidate += timedelta(minutes=1)
+        return None
+
+
+class ScheduledJob:
+    """A registered job with its schedule and run statistics (for this process)"""
+
+    def __init__(self, name: str, schedule: str, function: Callable, exclusive: bool = True):
+        self.name = name
+        self.schedule = CronSchedule(schedule)
+        self.function = function
+        self.exclusive = exclusive
+        self.lock_key = zlib.crc32(f"scheduled_job:{name}".encode())
+        self.running = False
+        self.run_count = 0
+        self.failure_count = 0
+        self.skipped_count = 0
+        self.last_started_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_status: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Schedule and statistics for the admin status endpoint"""
+        next_run = self.schedule.next_after(datetime.now())
+        return {
+            "name": self.name,
+            "schedule": self.schedule.expression,
+            "exclusive": self.exclusive,
+            "running": self.running,
+            "next_run": next_run.isoformat() if next_run else None,
+            "run_count": self.run_count,
+            "failure_count": self.failure_count,
+            "skipped_count": self.skipped_count,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_duration_ms": self.last_duration_ms,
+            "last_status": self.last_status,
+            "last_error": self.last_error
+        }
+
+
+class Scheduler:
+    """
+    Minute-resolution cron scheduler running jobs on a bounded thread pool.
+
+    Exclusive jobs take a PostgreSQL advisory lock before running, so across
+    all workers and replicas only one instance of a job runs at a time, and
+    then claim their cron tick with a unique (job_name, scheduled_for) row in
+    scheduled_job_runs, so a tick another worker already ran is not run
+    again. Either way the losers count the run as skipped. Runs of exclusive
+    jobs are recorded in scheduled_job_runs.
+    """
+
+    def __init__(self, engine, session_factory, max_workers: int = SCHEDULER_WORKERS):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_job(self, name: str, schedule: str, function: Callable, exclusive: bool = True) -> None:
+        """Register a job; function receives a database session"""
+        self.jobs[name] = ScheduledJob(name, schedule, function, exclusive)
+
+    def start(self) -> None:
+        """Start the scheduling thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scheduled-job")
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Scheduler started with {len(self.jobs)} jobs")
+
+    def stop(self) -> None:
+        """Stop scheduling and wait for running jobs to finish"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            now = datetime.now()
+            tick = now.replace(second=0, microsecond=0)
+            for job in list(self.jobs.values()):
+                if job.schedule.matches(tick):
+                    self.trigger(job.name, scheduled_for=tick)
+            next_tick = tick + timedelta(minutes=1)
+            self._stop.wait(max(0.0, (next_tick - datetime.now()).total_seconds()))
+
+    def trigger(self, name: str, scheduled_for: Optional[datetime] = None) -> bool:
+        """
+        Submit a job to the executor now. scheduled_for is the cron tick being
+        served; manual runs pass None and are never deduplicated. Returns False
+        if the job is unknown or already running in this process.
+        """
+        job = self.jobs.get(name)
+        if job is None or self._executor is None:
+            return False
+        with self._lock:
+            if job.running:
+                return False
+            job.running = True
+        self._executor.submit(self._run, job, scheduled_for)
+        return True
+
+    def _skip(self, job: ScheduledJob, reason: str) -> None:
+        job.skipped_count += 1
+        job.last_status = "skipped"
+        logger.info(f"Job {job.name} {reason}, skipped")
+
+    def _run(self, job: ScheduledJob, scheduled_for: Optional[datetime] = None) -> None:
+        lock_connection = None
+        acquired = False
+        try:
+            if job.exclusive:
+                lock_connection = self.engine.connect()
+                acquired = lock_connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": job.lock_key}
+                ).scalar()
+                lock_connection.commit()
+                if not acquired:
+                    self._skip(job, "is running elsewhere")
+                    return
+
+            job.last_started_at = datetime.now()
+            # Non-exclusive jobs run in every worker and are only counted in
+            # this process; recording them would add a row per worker per run
+            run_id = None
+            if job.exclusive:
+                run_id = self._claim_run(job, scheduled_for)
+                if run_id is None:
+                    self._skip(job, f"already ran for {scheduled_for:%Y-%m-%d %H:%M}")
+                    return
+
+            started = time.perf_counter()
+            error = None
+            db = self.session_factory()
+            try:
+                job.function(db)
+            except Exception as e:
+                db.rollback()
+                error = f"{type(e).__name__}: {e}"
+                logger.error(f"Job {job.name} failed: {error}\n{traceback.format_exc()}")
+            finally:
+                db.close()
+
+            job.last_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+            job.run_count += 1
+            job.last_status = "failed" if error else "success"
+            job.last_error = error
+            if error:
+                job.failure_count += 1
+            if run_id is not None:
+                self._finish_run(job, run_id, error)
+            logger.info(f"Job {job.name} finished ({job.last_status}) in {job.last_duration_ms} ms")
+        except Exception as e:
+            job.last_status = "failed"
+            job.last_error = f"{type(e).__name__}: {e}"
+            logger.error(f"Job {job.name} could not run: {e}")
+        finally:
+            if lock_connection is not None:
+                try:
+                    # Only release a lock this connection holds
+                    if acquired:
+                        lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": job.lock_key})
+                        lock_connection.commit()
+                finally:
+                    lock_connection.close()
+            job.running = False
+
+    def _claim_run(self, job: ScheduledJob, scheduled_for: Optional[datetime]) -> Optional[int]:
+        """
+        Insert the run as 'running' and return its id, or None if a run for
+        this job and tick already exists (NULL ticks never conflict). Called
+        with the job's advisory lock held, so other 'running' rows of the job
+        belong to workers that stopped mid-run and are marked failed.
+        """
+        with self.engine.begin() as connection:
+            stale = connection.execute(
+                text("""
+                    UPDATE scheduled_job_runs
+                    SET status = 'failed', error = 'Worker stopped before the run finished'
+                    WHERE job_name = :job_name AND status = 'running'
+                """),
+                {"job_name": job.name}
+            ).rowcount
+            if stale:
+                logger.warning(f"Marked {stale} unfinished runs of job {job.name} as failed")
+            return connection.execute(
+                text("""
+                    INSERT INTO scheduled_job_runs (job_name, scheduled_for, started_at, status)
+                    VALUES (:job_name, :scheduled_for, :started_at, 'running')
+                    ON CONFLICT (job_name, scheduled_for) DO NOTHING
+                    RETURNING run_id
+                """),
+                {"job_name": job.name, "scheduled_for": scheduled_for, "started_at": job.last_started_at}
+            ).scalar()
+
+    def _finish_run(self, job: ScheduledJob, run_id: int, error: Optional[str]) -> None:
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(
+                    text("""
+                        UPDATE scheduled_job_runs
+                        SET duration_ms = :duration_ms, status = :status, error = :error
+                        WHERE run_id = :run_id
+                    """),
+                    {
+                        "run_id": run_id,
+                        "duration_ms": job.last_duration_ms,
+                        "status": job.last_status,
+                        "error": error
+                    }
+                )
+        except Exception as e:
+            logger.warning(f"Could not record run of job {job.name}: {e}")
+
+    @staticmethod
+    def purge_runs(db, retention_days: int) -> Dict[str, Any]:
+        """Delete recorded job runs that started more than retention_days ago"""
+        deleted = db.execute(
+            text("DELETE FROM scheduled_job_runs WHERE started_at < NOW() - INTERVAL '1 day' * :days"),
+            {"days": retention_days}
+        ).rowcount
+        db.commit()
+        logger.info(f"Purged {deleted} scheduled job runs older than {retention_days} days")
+        return {"retention_days": retention_days, "deleted": deleted}
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Per-job schedule and statistics for this process"""
+        return [job.to_dict() for job in self.jobs.values()]
+
+    def recent_runs(self, db, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent recorded runs across all workers and replicas"""
+        result = db.execute(
+            text("""
+                SELECT job_name, scheduled_for, started_at, duration_ms, status, error
+                FROM scheduled_job_runs
+                ORDER BY started_at DESC
+                LIMIT :limit
+            """),
+            {"limit": limit}
+        )
+        return [
+            {
+                "job_name": row.job_name,
+                "scheduled_for": row.scheduled_for.isoformat() if row.scheduled_for else None,
+                "started_at": row.started_at.isoformat() if row.started_at else None,
+                "duration_ms": float(row.duration_ms) if row.duration_ms is not None else None,
+                "status": row.status,
+                "error": row.error
+            }
+            for row in result
+        ]
@@ -0,0 +1,197 @@
+"""
+Routing and cross-shard fan-out helpers for department-level sharding
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import List, Optional, Dict, Any, Callable, Iterator, Iterable
+from database import shard_router
+import contextvars
+import logging
+import math
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Threads used to query shards concurrently
+SHARD_FANOUT_WORKERS = int(os.getenv("SHARD_FANOUT_WORKERS", 8))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SHARD_FANOUT_WORKERS, thread_name_prefix="shard-fanout")
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """Shut down the fan-out thread pool (called on application shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def _run_on_shard(shard: str, function: Callable[[Session], Any]) -> Any:
+    db = shard_router.session(shard)
+    db.info["shard"] = shard
+    try:
+        return function(db)
+    finally:
+        db.close()
+
+
+def fan_out(db: Session, function: Callable[[Session], Any], shards: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Run function(session) on every shard (or the given ones) concurrently,
+    each with its own session, and return the results keyed by shard name.
+    session.info["shard"] names the shard. Without sharding the function
+    simply runs on db.
+    """
+    if not shard_router.sharded:
+        return {shard_router.names[0]: function(db)}
+
+    shards = list(shards) if shards is not None else shard_router.names
+    if len(shards) == 1:
+        return {shards[0]: _run_on_shard(shards[0], function)}
+
+    # Copy the context so per-request state such as query profiles follows the work
+    executor = _get_executor()
+    futures = {
+        shard: executor.submit(contextvars.copy_context().run, _run_on_shard, shard, function)
+        for shard in shards
+    }
+    return {shard: future.result() for shard, future in futures.items()}
+
+
+@contextmanager
+def shard_session(db: Session, shard: str) -> Iterator[Session]:
+    """Session on a shard; db itself when not sharded"""
+    if not shard_router.sharded:
+        yield db
+        return
+    session = shard_router.session(shard)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def department_session(db: Session, department_id: int):
+    """Session on the shard holding a department's employees"""
+    return shard_session(db, shard_router.shard_for_department(department_id))
+
+
+def locate_employee(db: Session, employee_id: int) -> Optional[str]:
+    """
+    Shard holding an employee, found with a concurrent primary key lookup on
+    every shard. Without sharding this is the only shard and no query is run.
+    """
+    if not shard_router.sharded:
+        return shard_router.names[0]
+    found = fan_out(db, lambda session: session.execute(
+        text("SELECT 1 FROM employees WHERE employee_id = :employee_id"), {"employee_id": employee_id}
+    ).scalar())
+    return next((shard for shard, exists in found.items() if exists), None)
+
+
+def group_by_shard(items: Iterable[Any], department_id: Callable[[Any], int]) -> Dict[str, List[int]]:
+    """Indexes of items grouped by the shard of their department, in input order"""
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        groups.setdefault(shard_router.shard_for_department(department_id(item)), []).append(index)
+    return groups
+
+
+def replicate_departments(db: Session) -> None:
+    """
+    Copy the departments table from the main database to every shard, where
+    employees reference it by foreign key. Departments are few, so the whole
+    table is upserted.
+    """
+    if not shard_router.sharded:
+        return
+
+    departments = [dict(row._mapping) for row in db.execute(
+        text("SELECT department_id, department_name, location, created_at FROM departments")
+    )]
+    if not departments:
+        return
+
+    def upsert(session: Session) -> None:
+        session.execute(
+            text("""
+                INSERT INTO departments (department_id, department_name, location, created_at)
+                VALUES (:department_id, :department_name, :location, :created_at)
+                ON CONFLICT (department_id) DO UPDATE
+                SET department_name = EXCLUDED.department_name, location = EXCLUDED.location
+            """),
+            departments
+        )
+        session.commit()
+
+    for shard, shard_engine in shard_router.engines.items():
+        if shard_engine is not db.get_bind():
+            _run_on_shard(shard, upsert)
+    logger.info(f"Replicated {len(departments)} departments to {len(shard_router.names)} shards")
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative accuracy (DDSketch-style).
+
+    Positive values fall into logarithmic buckets ceil(log_gamma(value)), so
+    every shard can build its buckets with one GROUP BY and the merged counts
+    answer quantiles within `relative_accuracy` of the exact value.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.buckets.values())
+
+    def bucket_sql(self, column: str) -> str:
+        """SQL expression computing a value's bucket index (NULL for zero)"""
+        return f"CASE WHEN {column} > 0 THEN CEIL(LN({column}) / LN({self.gamma!r}))::int END"
+
+    def add_buckets(self, rows: Iterable[Any]) -> "QuantileSketch":
+        """Add (bucket, count) rows; a NULL bucket counts zero values"""
+        for bucket, count in rows:
+            if bucket is None:
+                self.zero_count += count
+            else:
+                self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        self.zero_count += other.zero_count
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated value at quantile q (0..1), or None when empty"""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if rank < seen:
+                return 2 * math.pow(self.gamma, bucket) / (self.gamma + 1)
+        return 2 * math.pow(self.gamma, max(self.buckets)) / (self.gamma + 1)
@@ -0,0 +1,384 @@
+"""
+Payroll projection and what-if raise simulation
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import List, Optional, Dict, Any
+from datetime import date, datetime
+from decimal import Decimal
+from services.csv_pipeline import MAX_SALARY, VALID_STATUSES
+from services.sharding import fan_out
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds an in-memory salary snapshot is reused before it is reloaded
+SIMULATION_SNAPSHOT_TTL = int(os.getenv("SIMULATION_SNAPSHOT_TTL", 300))
+
+# Rows fetched per round trip while loading a snapshot
+SNAPSHOT_LOAD_BATCH_ROWS = 100000
+
+DAYS_PER_YEAR = 365.25
+
+DISTRIBUTION_PERCENTILES = (10, 25, 50, 75, 90)
+
+EPOCH = date(1970, 1, 1)
+
+# Products of salaries in cents and scaled multipliers must stay below this to be exact in int64
+EXACT_PRODUCT_LIMIT = 2 ** 62
+
+
+class SalarySnapshot:
+    """
+    Column arrays of every employee's department, status, salary and join
+    date, held in numpy so a scenario is evaluated with array operations
+    instead of a query per rule or a Python loop per employee.
+    """
+
+    def __init__(self, employee_ids, department_ids, status_codes, statuses, salaries, joined_days):
+        import numpy as np
+
+        self.employee_ids = employee_ids
+        self.status_codes = status_codes
+        self.statuses: List[str] = statuses
+        self.salaries = salaries
+        self.joined_days = joined_days
+        # Dense department index for bincount aggregation
+        self.departments, self.department_index = np.unique(department_ids, return_inverse=True)
+        self.department_ids = department_ids
+        self.loaded_at = datetime.now()
+        self._loaded_monotonic = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.salaries)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self._loaded_monotonic
+
+    def status_code(self, status: str) -> int:
+        """Code of a status value in this snapshot, or -1 if no employee has it"""
+        return self.statuses.index(status) if status in self.statuses else -1
+
+    @classmethod
+    def load(cls, db: Session, batch_rows: int = SNAPSHOT_LOAD_BATCH_ROWS) -> "SalarySnapshot":
+        """
+        Read the salary columns of all employees through server-side cursors,
+        from every shard concurrently when sharded
+        """
+        import numpy as np
+
+        started = time.perf_counter()
+
+        def read(session: Session) -> Dict[str, list]:
+            result = session.execute(
+                text("""
+                    SELECT employee_id, department_id, status, salary::float8 AS salary,
+                           date_joined - DATE '1970-01-01' AS joined_day
+                    FROM employees
+                """),
+                execution_options={"yield_per": batch_rows}
+            )
+
+            shard_columns = {"employee_id": [], "department_id": [], "status": [], "salary": [], "joined_day": []}
+            for rows in result.partitions(batch_rows):
+                employee_ids, department_ids, statuses, salaries, joined_days = zip(*rows)
+                shard_columns["employee_id"].append(np.array(employee_ids, dtype=np.int32))
+                shard_columns["department_id"].append(np.array(department_ids, dtype=np.int32))
+                shard_columns["status"].append(np.array([status or "" for status in statuses], dtype=object))
+                shard_columns["salary"].append(np.array(salaries, dtype=np.float64))
+                shard_columns["joined_day"].append(np.array(joined_days, dtype=np.int32))
+            return shard_columns
+
+        columns = {"employee_id": [], "department_id": [], "status": [], "salary": [], "joined_day": []}
+        for shard_columns in fan_out(db, read).values():
+            for name, arrays in shard_columns.items():
+                columns[name].extend(arrays)
+
+        def concatenate(name, dtype):
+            return np.concatenate(columns[name]) if columns[name] else np.empty(0, dtype=dtype)
+
+        status_values, status_codes = np.unique(concatenate("status", object), return_inverse=True)
+        snapshot = cls(
+            concatenate("employee_id", np.int32),
+            concatenate("department_id", np.int32),
+            status_codes.astype(np.int8),
+            [str(value) for value in status_values],
+            concatenate("salary", np.float64),
+            concatenate("joined_day", np.int32)
+        )
+        logger.info(f"Loaded salary snapshot of {len(snapshot)} employees in {time.perf_counter() - started:.2f}s")
+        return snapshot
+
+
+_snapshot: Optional[SalarySnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot(db: Session, refresh: bool = False) -> SalarySnapshot:
+    """Return the cached salary snapshot, loading it when missing, expired or refresh is set"""
+    global _snapshot
+    with _snapshot_lock:
+        if refresh or _snapshot is None or _snapshot.age > SIMULATION_SNAPSHOT_TTL:
+            _snapshot = SalarySnapshot.load(db)
+        return _snapshot
+
+
+def invalidate_snapshot() -> None:
+    """Drop the cached snapshot so the next simulation reloads it"""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+def _check_rules(rules: List[Dict[str, Any]]) -> None:
+    if not rules:
+        raise ValueError("At least one raise rule is required")
+    for index, rule in enumerate(rules):
+        min_years = rule.get("min_tenure_years")
+        max_years = rule.get("max_tenure_years")
+        if min_years is not None and max_years is not None and min_years >= max_years:
+            raise ValueError(f"Rule {index}: min_tenure_years must be less than max_tenure_years")
+        if (rule.get("raise_percent") or 0) < -100:
+            raise ValueError(f"Rule {index}: raise_percent must not be below -100")
+
+
+def _check_statuses(statuses: List[str]) -> None:
+    invalid = [status for status in statuses if status not in VALID_STATUSES]
+    if invalid:
+        raise ValueError(f"Invalid status: {', '.join(invalid)}; expected {' or '.join(VALID_STATUSES)}")
+
+
+def _places(value: Decimal) -> int:
+    return max(0, -value.as_tuple().exponent)
+
+
+def _project_salaries(salaries, rules: List[Dict[str, Any]], assigned):
+    """
+    New salaries for ROUND(salary * multiplier + amount, 2) as apply runs it.
+    PostgreSQL computes that in NUMERIC and rounds half away from zero, so
+    each rule is projected in integer cents scaled by the decimal places of
+    its multiplier and amount (taken from their repr, which is what the
+    driver sends) instead of in floats. A rule whose scaled values would
+    overflow int64 falls back to floats, still rounding half away from zero.
+    """
+    import numpy as np
+
+    cents = np.rint(salaries * 100).astype(np.int64)
+    largest = int(np.abs(cents).max()) if cents.size else 0
+    projected = np.empty(len(salaries))
+
+    # The trailing identity entry serves employees no rule matched (assigned == -1)
+    for index, rule in enumerate(rules + [{}]):
+        rows = assigned == (index if index < len(rules) else -1)
+        if not rows.any():
+            continue
+        multiplier = Decimal(repr(1 + (rule.get("raise_percent") or 0) / 100))
+        amount = Decimal(repr(rule.get("raise_amount") or 0))
+        scale = 10 ** max(_places(multiplier), _places(amount) - 2)
+        scaled_multiplier = int(multiplier * scale)
+        scaled_amount = int(amount * 100 * scale)
+
+        if largest * abs(scaled_multiplier) + abs(scaled_amount) < EXACT_PRODUCT_LIMIT:
+            scaled = cents[rows] * scaled_multiplier + scaled_amount
+            projected[rows] = np.sign(scaled) * ((np.abs(scaled) + scale // 2) // scale) / 100
+        else:
+            raw = salaries[rows] * float(multiplier) + float(amount)
+            projected[rows] = np.sign(raw) * np.floor(np.abs(raw) * 100 + 0.5) / 100
+    return projected
+
+
+def _round(value) -> float:
+    return round(float(value), 2)
+
+
+def _distribution(salaries) -> Dict[str, Any]:
+    import numpy as np
+
+    if not salaries.size:
+        return {"avg": 0, "min": 0, "max": 0, **{f"p{p}": 0 for p in DISTRIBUTION_PERCENTILES}}
+    percentiles = np.percentile(salaries, DISTRIBUTION_PERCENTILES)
+    return {
+        "avg": _round(salaries.mean()),
+        "min": _round(salaries.min()),
+        "max": _round(salaries.max()),
+        **{f"p{p}": _round(value) for p, value in zip(DISTRIBUTION_PERCENTILES, percentiles)}
+    }
+
+
+class SimulationService:
+    """Service class for payroll projections and raise scenarios"""
+
+    @staticmethod
+    def simulate(
+        db: Session,
+        rules: List[Dict[str, Any]],
+        statuses: Optional[List[str]] = None,
+        as_of: Optional[date] = None,
+        refresh: bool = False,
+        department_names: Optional[Dict[int, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Evaluate a raise scenario against the in-memory salary snapshot without
+        writing anything.
+
+        Each rule may filter on department_id, status and tenure in years
+        (min inclusive, max exclusive) and sets raise_percent and/or a flat
+        raise_amount. Rules are checked in order and the first match applies,
+        so a rule without filters at the end acts as "everyone else".
+        Payroll totals cover employees whose status is in statuses (default active).
+        """
+        import numpy as np
+
+        _check_rules(rules)
+        statuses = statuses or ["active"]
+        _check_statuses(statuses)
+        as_of = as_of or date.today()
+        snapshot = get_snapshot(db, refresh=refresh)
+        started = time.perf_counter()
+
+        status_codes = [snapshot.status_code(status) for status in statuses]
+        population = np.isin(snapshot.status_codes, status_codes)
+        tenure_days = (as_of - EPOCH).days - snapshot.joined_days
+
+        # Index of the first matching rule per employee; -1 (no rule) picks the
+        # trailing identity entry of the multiplier and amount arrays
+        assigned = np.full(len(snapshot), -1, dtype=np.int32)
+        for index, rule in enumerate(rules):
+            mask = population & (assigned == -1)
+            if rule.get("department_id") is not None:
+                mask &= snapshot.department_ids == rule["department_id"]
+            if rule.get("status"):
+                mask &= snapshot.status_codes == snapshot.status_code(rule["status"])
+            if rule.get("min_tenure_years") is not None:
+                mask &= tenure_days >= rule["min_tenure_years"] * DAYS_PER_YEAR
+            if rule.get("max_tenure_years") is not None:
+                mask &= tenure_days < rule["max_tenure_years"] * DAYS_PER_YEAR
+            assigned[mask] = index
+
+        projected = _project_salaries(snapshot.salaries, rules, assigned)
+
+        current = snapshot.salaries[population]
+        projected = projected[population]
+        assigned = assigned[population]
+        department_index = snapshot.department_index[population]
+        delta = projected - current
+
+        department_count = len(snapshot.departments)
+        department_headcount = np.bincount(department_index, minlength=department_count)
+        department_current = np.bincount(department_index, weights=current, minlength=department_count)
+        department_delta = np.bincount(department_index, weights=delta, minlength=department_count)
+        rule_matched = np.bincount(assigned + 1, minlength=len(rules) + 1)[1:]
+        rule_delta = np.bincount(assigned + 1, weights=delta, minlength=len(rules) + 1)[1:]
+
+        current_total = float(current.sum())
+        projected_total = float(projected.sum())
+        department_names = department_names or {}
+
+        return {
+            "as_of": as_of.isoformat(),
+            "snapshot_loaded_at": snapshot.loaded_at.isoformat(),
+            "statuses": statuses,
+            "employees": int(population.sum()),
+            "affected_employees": int((assigned != -1).sum()),
+            "current_payroll": _round(current_total),
+            "projected_payroll": _round(projected_total),
+            "delta": _round(projected_total - current_total),
+            "delta_percent": _round((projected_total / current_total - 1) * 100) if current_total else 0,
+            "invalid_salaries": int(((projected < 0) | (projected > MAX_SALARY)).sum()),
+            "distribution": {
+                "current": _distribution(current),
+                "projected": _distribution(projected)
+            },
+            "rules": [
+                {
+                    "rule": index,
+                    "matched_employees": int(rule_matched[index]),
+                    "delta": _round(rule_delta[index])
+                }
+                for index in range(len(rules))
+            ],
+            "departments": [
+                {
+                    "department_id": int(department_id),
+                    "department_name": department_names.get(int(department_id)),
+                    "employees": int(department_headcount[index]),
+                    "current_payroll": _round(department_current[index]),
+                    "projected_payroll": _round(department_current[index] + department_delta[index]),
+                    "delta": _round(department_delta[index]),
+                    "delta_percent": _round(department_delta[index] / department_current[index] * 100)
+                    if department_current[index] else 0
+                }
+                for index, department_id in enumerate(snapshot.departments)
+                if department_headcount[index]
+            ],
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    @staticmethod
+    def apply(
+        db: Session,
+        rules: List[Dict[str, Any]],
+        statuses: Optional[List[str]] = None,
+        as_of: Optional[date] = None
+    ) -> int:
+        """
+        Commit a raise scenario with one set-based UPDATE. The rules become a
+        CASE expression evaluated against current table data with the same
+        first-match semantics as simulate. Returns the number of updated employees.
+        """
+        _check_rules(rules)
+        _check_statuses(statuses or ["active"])
+        params: Dict[str, Any] = {
+            "statuses": statuses or ["active"],
+            "as_of": as_of or date.today()
+        }
+
+        branches = []
+        for index, rule in enumerate(rules):
+            conditions = []
+            if rule.get("department_id") is not None:
+                conditions.append(f"department_id = :department_id_{index}")
+                params[f"department_id_{index}"] = rule["department_id"]
+            if rule.get("status"):
+                conditions.append(f"status = :status_{index}")
+                params[f"status_{index}"] = rule["status"]
+            if rule.get("min_tenure_years") is not None:
+                conditions.append(f"(CAST(:as_of AS DATE) - date_joined) >= :min_days_{index}")
+                params[f"min_days_{index}"] = rule["min_tenure_years"] * DAYS_PER_YEAR
+            if rule.get("max_tenure_years") is not None:
+                conditions.append(f"(CAST(:as_of AS DATE) - date_joined) < :max_days_{index}")
+                params[f"max_days_{index}"] = rule["max_tenure_years"] * DAYS_PER_YEAR
+            params[f"multiplier_{index}"] = 1 + (rule.get("raise_percent") or 0) / 100
+            params[f"amount_{index}"] = rule.get("raise_amount") or 0
+            branches.append((
+                " AND ".join(conditions) or "TRUE",
+                f"salary * CAST(:multiplier_{index} AS NUMERIC) + CAST(:amount_{index} AS NUMERIC)"
+            ))
+
+        case = " ".join(f"WHEN {condition} THEN {value}" for condition, value in branches)
+        matched = " OR ".join(f"({condition})" for condition, _ in branches)
+        query = text(f"""
+            UPDATE employees
+            SET salary = ROUND(CASE {case} ELSE salary END, 2)
+            WHERE status = ANY(:statuses) AND ({matched})
+        """)
+
+        # With sharding each shard commits its own update; there is no cross-shard transaction
+        def update(session: Session) -> int:
+            try:
+                result = session.execute(query, params)
+                session.commit()
+                return result.rowcount
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Error applying raise scenario: {e}")
+                raise
+
+        updated = sum(fan_out(db, update).values())
+        invalidate_snapshot()
+        logger.info(f"Applied raise scenario to {updated} employees")
+        return updated
@@ -0,0 +1,150 @@
+"""
+Streaming decoders for employee upload formats (CSV, NDJSON, Parquet)
+"""
+from typing import List, Optional, Dict, Any, Iterator, Tuple, FrozenSet, Callable, BinaryIO
+import gzip
+import json
+import os
+from services.csv_pipeline import CHUNK_SIZE, REQUIRED_FIELDS, iter_csv_tasks, split_chunks, validate_records
+
+# Rows per Parquet record batch handed to a worker
+PARQUET_BATCH_ROWS = int(os.getenv("PARQUET_BATCH_ROWS", 50000))
+
+UPLOAD_COLUMNS = REQUIRED_FIELDS + ["status"]
+
+COMPRESSION_SUFFIXES = {
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".zst": "zstd",
+    ".zstd": "zstd"
+}
+
+FORMAT_SUFFIXES = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".parquet": "parquet"
+}
+
+
+def detect_format(filename: str) -> Tuple[str, Optional[str]]:
+    """
+    Detect (format, compression) from an upload's file name, for example
+    employees.csv.gz -> ("csv", "gzip"). Raises ValueError for unsupported names.
+    """
+    name = (filename or "").lower()
+    compression = None
+    for suffix, codec in COMPRESSION_SUFFIXES.items():
+        if name.endswith(suffix):
+            compression = codec
+            name = name[:-len(suffix)]
+            break
+
+    for suffix, upload_format in FORMAT_SUFFIXES.items():
+        if name.endswith(suffix):
+            if upload_format == "parquet" and compression:
+                raise ValueError("Parquet files are compressed internally and must not be gzip/zstd wrapped")
+            return upload_format, compression
+
+    raise ValueError("File must be CSV, NDJSON or Parquet, optionally compressed with gzip or zstd")
+
+
+def open_decompressed(stream: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    """Wrap a binary stream so that reads return decompressed bytes incrementally"""
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd uploads require the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(stream)
+    return stream
+
+
+def validate_ndjson_chunk(chunk: bytes, department_ids: FrozenSet[int]) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]], int]:
+    """
+    Decode and validate one chunk of NDJSON lines.
+    Every line counts towards row numbering, so reported rows match line numbers;
+    blank lines are skipped and undecodable lines are reported as errors.
+    """
+    lines = chunk.decode("utf-8").split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+
+    valid = []
+    errors = []
+    for offset, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            errors.append({"row": offset, "error": f"Invalid JSON: {str(e)}", "data": {"line": line}})
+            continue
+        if not isinstance(record, dict):
+            errors.append({"row": offset, "error": "Each line must be a JSON object", "data": {"line": line}})
+            continue
+
+        batch_valid, batch_errors, _ = validate_records([record], department_ids)
+        valid.extend((offset, data) for _, data in batch_valid)
+        errors.extend({**error, "row": offset} for error in batch_errors)
+
+    return valid, errors, len(lines)
+
+
+def validate_arrow_batch(batch, department_ids: FrozenSet[int]) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Any]], int]:
+    """Convert and validate one pyarrow RecordBatch inside a worker process"""
+    return validate_records(batch.to_pylist(), department_ids)
+
+
+def _line_boundary(buffer: bytes) -> int:
+    """Offset just past the last newline in buffer, or 0 if there is none"""
+    return buffer.rfind(b"\n") + 1
+
+
+def iter_ndjson_tasks(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[Callable, tuple]]:
+    """Yield validation tasks for an NDJSON stream, split on line boundaries"""
+    # JSON strings cannot contain raw newlines, so every newline ends a record.
+    # CSV quote counting does not apply: escaped \" quotes would unbalance it.
+    for chunk in split_chunks(stream, chunk_size, _line_boundary):
+        yield validate_ndjson_chunk, (chunk,)
+
+
+def iter_parquet_tasks(stream: BinaryIO, batch_rows: int = PARQUET_BATCH_ROWS) -> Iterator[Tuple[Callable, tuple]]:
+    """
+    Return validation tasks for a Parquet file, one per record batch. Only the
+    upload columns are read, and only one row group is decoded at a time.
+    A missing pyarrow or an unreadable file raises ValueError immediately,
+    before any task is consumed.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet uploads require the pyarrow package")
+
+    try:
+        parquet_file = pq.ParquetFile(stream)
+    except Exception as e:
+        raise ValueError(f"Invalid Parquet file: {str(e)}")
+    columns = [name for name in parquet_file.schema_arrow.names if name in UPLOAD_COLUMNS]
+    return (
+        (validate_arrow_batch, (batch,))
+        for batch in parquet_file.iter_batches(batch_size=batch_rows, columns=columns)
+    )
+
+
+def iter_upload_tasks(stream: BinaryIO, filename: str) -> Tuple[Iterator[Tuple[Callable, tuple]], int]:
+    """
+    Build the validation task stream for an uploaded file.
+    Returns (tasks, first_row) where first_row is the number of the first data row.
+    """
+    upload_format, compression = detect_format(filename)
+
+    if upload_format == "parquet":
+        return iter_parquet_tasks(stream), 1
+
+    stream = open_decompressed(stream, compression)
+    if upload_format == "ndjson":
+        return iter_ndjson_tasks(stream), 1
+    return iter_csv_tasks(stream), 2
@@ -0,0 +1,91 @@
+"""
+Pin the number of SQL statements sent per employee write.
+
+create, update and delete each use a single INSERT/UPDATE/DELETE ... RETURNING
+instead of the ORM's flush, refresh and relationship loads. The tests run on
+an in-memory SQLite database (without sharding), which is enough to count the
+statements the service layer emits.
+"""
+from datetime import date
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import pytest
+
+from database import Base
+from models.department import Department
+from models.employee import Employee
+from services.employee_service import EmployeeService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[Department.__table__, Employee.__table__])
+    session = sessionmaker(bind=engine)()
+    session.add(Department(department_id=1, department_name="Engineering", location="Remote"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(db):
+    """Statements sent to the database while the test runs"""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    bind = db.get_bind()
+    event.listen(bind, "before_cursor_execute", record)
+    yield executed
+    event.remove(bind, "before_cursor_execute", record)
+
+
+def _employee_data(email: str = "ada@example.com") -> dict:
+    return {
+        "first_name": "Ada",
+        "last_name": "Lovelace",
+        "email": email,
+        "salary": 85000,
+        "department_id": 1,
+        "date_joined": date(2020, 1, 15),
+        "status": "active"
+    }
+
+
+def test_create_employee_is_one_statement(db, statements):
+    employee = EmployeeService.create_employee(db, _employee_data())
+
+    assert employee.employee_id is not None
+    assert employee.email == "ada@example.com"
+    assert len(statements) == 1
+    assert statements[0].lstrip().upper().startswith("INSERT")
+
+
+def test_update_employee_is_one_statement(db, statements):
+    employee = EmployeeService.create_employee(db, _employee_data())
+    statements.clear()
+
+    updated = EmployeeService.update_employee(db, employee.employee_id, {"salary": 90000})
+
+    assert float(updated.salary) == 90000
+    assert len(statements) == 1
+    assert statements[0].lstrip().upper().startswith("UPDATE")
+
+
+def test_update_missing_employee_is_one_statement(db, statements):
+    assert EmployeeService.update_employee(db, 999, {"salary": 90000}) is None
+    assert len(statements) == 1
+
+
+def test_delete_employee_is_one_statement(db, statements):
+    employee = EmployeeService.create_employee(db, _employee_data())
+    statements.clear()
+
+    assert EmployeeService.delete_employee(db, employee.employee_id) is True
+    assert len(statements) == 1
+    assert statements[0].lstrip().upper().startswith("DELETE")
+    assert db.get(Employee, employee.employee_id) is None
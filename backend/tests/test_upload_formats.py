@@ -0,0 +1,40 @@
+"""
+Chunking and validation of NDJSON uploads. Chunks stay near the chunk size
+whatever the lines contain, so peak memory does not grow with the file.
+"""
+import io
+import json
+
+from services.upload_formats import iter_ndjson_tasks, validate_ndjson_chunk
+
+
+def test_escaped_quotes_do_not_stop_ndjson_splitting():
+    lines = [json.dumps({"last_name": 'O"Neil' if i == 2 else "Smith", "row": i}) for i in range(20000)]
+    data = ("\n".join(lines) + "\n").encode()
+
+    chunks = [payload[0] for _, payload in iter_ndjson_tasks(io.BytesIO(data), 4096)]
+
+    assert b"".join(chunks) == data
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    assert max(len(chunk) for chunk in chunks) < 2 * 4096
+
+
+def test_non_finite_salaries_are_row_errors():
+    lines = [
+        '{"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com", "salary": NaN, '
+        '"department_id": 1, "date_joined": "2020-01-01"}',
+        '{"first_name": "Alan", "last_name": "Turing", "email": "alan@example.com", "salary": Infinity, '
+        '"department_id": 1, "date_joined": "2020-01-01"}',
+        '{"first_name": "Grace", "last_name": "Hopper", "email": "grace@example.com", "salary": 5000, '
+        '"department_id": 1, "date_joined": "2020-01-01"}'
+    ]
+    data = ("\n".join(lines) + "\n").encode()
+
+    valid, errors, count = validate_ndjson_chunk(data, frozenset({1}))
+
+    assert count == 3
+    assert [offset for offset, _ in valid] == [2]
+    assert [(error["row"], error["error"]) for error in errors] == [
+        (0, "Salary must be a finite number"),
+        (1, "Salary must be a finite number")
+    ]
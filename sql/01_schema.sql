@@ -30,6 +30,8 @@ CREATE TABLE IF NOT EXISTS employee_audit_log (
     action_type VARCHAR(20) NOT NULL CHECK (action_type IN ('INSERT', 'UPDATE', 'DELETE')),
     old_salary NUMERIC(10, 2),
     new_salary NUMERIC(10, 2),
+    old_status VARCHAR(20),
+    new_status VARCHAR(20),
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (employee_id) REFERENCES employees(employee_id) ON DELETE CASCADE
 );
@@ -45,3 +47,45 @@ CREATE TABLE IF NOT EXISTS performance_data (
     UNIQUE(employee_id, rating_year)
 );
 
+-- Create department_daily_snapshot table (headcount/payroll time series)
+CREATE TABLE IF NOT EXISTS department_daily_snapshot (
+    snapshot_date DATE NOT NULL,
+    department_id INTEGER NOT NULL,
+    headcount INTEGER NOT NULL DEFAULT 0,
+    active_payroll NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    hires INTEGER NOT NULL DEFAULT 0,
+    resignations INTEGER NOT NULL DEFAULT 0,
+    tenure_under_1y INTEGER NOT NULL DEFAULT 0,
+    tenure_1_3y INTEGER NOT NULL DEFAULT 0,
+    tenure_3_5y INTEGER NOT NULL DEFAULT 0,
+    tenure_over_5y INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (snapshot_date, department_id),
+    FOREIGN KEY (department_id) REFERENCES departments(department_id) ON DELETE CASCADE
+);
+
+-- Create scheduled_job_runs table (history of in-process scheduled jobs)
+CREATE TABLE IF NOT EXISTS scheduled_job_runs (
+    run_id SERIAL PRIMARY KEY,
+    job_name VARCHAR(100) NOT NULL,
+    scheduled_for TIMESTAMP,
+    started_at TIMESTAMP NOT NULL,
+    duration_ms NUMERIC(12, 1),
+    status VARCHAR(20) NOT NULL,
+    error TEXT,
+    CONSTRAINT scheduled_job_runs_status_check CHECK (status IN ('running', 'success', 'failed'))
+);
+
+-- Shard layout and department placement (main database, used with SHARD_DATABASE_URLS).
+-- Placement is recorded the first time a department is routed, so changing
+-- the number of shards never re-homes existing departments.
+CREATE TABLE IF NOT EXISTS shard_layout (
+    position INTEGER PRIMARY KEY,
+    shard VARCHAR(100) NOT NULL UNIQUE,
+    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS department_shards (
+    department_id INTEGER PRIMARY KEY,
+    shard VARCHAR(100) NOT NULL,
+    placed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
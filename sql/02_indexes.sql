@@ -6,8 +6,6 @@ CREATE INDEX IF NOT EXISTS idx_emp_dept ON employees(department_id);
 CREATE INDEX IF NOT EXISTS idx_emp_status ON employees(status);
 CREATE INDEX IF NOT EXISTS idx_emp_salary ON employees(salary);
 CREATE INDEX IF NOT EXISTS idx_emp_email ON employees(email);
-CREATE INDEX IF NOT EXISTS idx_audit_employee ON employee_audit_log(employee_id);
-CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON employee_audit_log(timestamp);
 CREATE INDEX IF NOT EXISTS idx_perf_employee ON performance_data(employee_id);
 CREATE INDEX IF NOT EXISTS idx_perf_year ON performance_data(rating_year);
 
@@ -19,8 +17,17 @@ CREATE INDEX IF NOT EXISTS idx_emp_joined_date ON employees(date_joined);
 -- Index for department lookups
 CREATE INDEX IF NOT EXISTS idx_dept_name ON departments(department_name);
 
--- Index for audit log queries by action type
-CREATE INDEX IF NOT EXISTS idx_audit_action ON employee_audit_log(action_type);
+-- Index for audit log queries by action type, in keyset (log_id) order
+DROP INDEX IF EXISTS idx_audit_action;
+CREATE INDEX IF NOT EXISTS idx_audit_action_log ON employee_audit_log(action_type, log_id);
+
+-- Index for time lookups in the audit log: /audit resolves since/until to
+-- log_id bounds with one probe each and then pages on the primary key;
+-- audit summaries and retention scan time ranges. Supersedes
+-- idx_audit_timestamp and idx_audit_action_timestamp_log.
+DROP INDEX IF EXISTS idx_audit_timestamp;
+DROP INDEX IF EXISTS idx_audit_action_timestamp_log;
+CREATE INDEX IF NOT EXISTS idx_audit_timestamp_log ON employee_audit_log(timestamp, log_id);
 
 -- Index for performance data queries
 CREATE INDEX IF NOT EXISTS idx_perf_employee_year ON performance_data(employee_id, rating_year);
@@ -33,3 +40,26 @@ WHERE status = 'active';
 CREATE INDEX IF NOT EXISTS idx_emp_salary_range ON employees(salary) 
 WHERE status = 'active';
 
+-- Index for per-department time series lookups on snapshots
+CREATE INDEX IF NOT EXISTS idx_snapshot_dept_date ON department_daily_snapshot(department_id, snapshot_date);
+
+-- Index for replaying status changes from the audit log
+CREATE INDEX IF NOT EXISTS idx_audit_employee_timestamp ON employee_audit_log(employee_id, timestamp);
+
+-- Index for recent job run lookups
+CREATE INDEX IF NOT EXISTS idx_job_runs_started ON scheduled_job_runs(started_at DESC);
+
+-- One run per job and cron tick across all workers and replicas; manual
+-- runs have no scheduled_for and are not deduplicated
+CREATE UNIQUE INDEX IF NOT EXISTS idx_job_runs_tick ON scheduled_job_runs(job_name, scheduled_for);
+
+-- Covering index for per-employee audit pages and salary timelines (/audit):
+-- keyed for keyset pagination on log_id and carrying every column those
+-- queries read, so they run as index-only scans. Supersedes idx_audit_employee.
+DROP INDEX IF EXISTS idx_audit_employee;
+CREATE INDEX IF NOT EXISTS idx_audit_employee_log ON employee_audit_log(employee_id, log_id)
+INCLUDE (action_type, old_salary, new_salary, old_status, new_status, timestamp);
+
+-- The audit log is append-only; vacuum it after inserts as well, so the
+-- visibility map stays current and index-only scans skip heap fetches
+ALTER TABLE employee_audit_log SET (autovacuum_vacuum_insert_scale_factor = 0.01);
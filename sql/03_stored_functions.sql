@@ -42,6 +42,34 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Function: Get statistics for many departments in one grouped query
+-- Pass NULL for all departments. Written in SQL (not plpgsql) so the planner
+-- can inline it into the caller's query.
+CREATE OR REPLACE FUNCTION get_department_stats_batch(dept_ids INTEGER[] DEFAULT NULL)
+RETURNS TABLE(
+    department_id INTEGER,
+    department_name VARCHAR,
+    total_employees BIGINT,
+    active_employees BIGINT,
+    avg_salary NUMERIC,
+    max_salary NUMERIC,
+    min_salary NUMERIC
+) AS $$
+    SELECT 
+        d.department_id,
+        d.department_name,
+        COUNT(e.employee_id)::BIGINT as total_employees,
+        COUNT(CASE WHEN e.status = 'active' THEN 1 END)::BIGINT as active_employees,
+        AVG(CASE WHEN e.status = 'active' THEN e.salary END) as avg_salary,
+        MAX(CASE WHEN e.status = 'active' THEN e.salary END) as max_salary,
+        MIN(CASE WHEN e.status = 'active' THEN e.salary END) as min_salary
+    FROM departments d
+    LEFT JOIN employees e ON d.department_id = e.department_id
+    WHERE dept_ids IS NULL OR d.department_id = ANY(dept_ids)
+    GROUP BY d.department_id, d.department_name
+    ORDER BY d.department_id;
+$$ LANGUAGE sql STABLE;
+
 -- Function: Get top N departments by average salary
 CREATE OR REPLACE FUNCTION get_top_departments_by_salary(n INTEGER DEFAULT 5)
 RETURNS TABLE(
@@ -142,7 +170,7 @@ BEGIN
                 (emp_record->>'date_joined')::DATE,
                 COALESCE(emp_record->>'status', 'active')
             )
-            RETURNING employee_id INTO new_emp_id;
+            RETURNING employees.employee_id INTO new_emp_id;
             
             RETURN QUERY SELECT 
                 new_emp_id,
@@ -164,3 +192,166 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+
+-- Function: Set-based insert of employees already validated by the API
+-- One INSERT for the whole batch, without per-row subtransactions. Sets
+-- app.prevalidated for the statement so the BEFORE triggers that normalize
+-- names and validate emails are skipped; audit triggers still run. Any
+-- failure aborts the whole batch (callers fall back to bulk_insert_employees).
+CREATE OR REPLACE FUNCTION bulk_insert_validated_employees(
+    emp_data JSONB
+)
+RETURNS TABLE(
+    employee_id INTEGER,
+    email VARCHAR
+) AS $$
+BEGIN
+    PERFORM set_config('app.prevalidated', 'on', true);
+    
+    RETURN QUERY
+    INSERT INTO employees AS e (
+        first_name, last_name, email, salary, 
+        department_id, date_joined, status
+    )
+    SELECT 
+        r.first_name,
+        r.last_name,
+        r.email,
+        r.salary,
+        r.department_id,
+        r.date_joined,
+        COALESCE(r.status, 'active')
+    FROM jsonb_to_recordset(emp_data) AS r(
+        first_name VARCHAR,
+        last_name VARCHAR,
+        email VARCHAR,
+        salary NUMERIC,
+        department_id INTEGER,
+        date_joined DATE,
+        status VARCHAR
+    )
+    RETURNING e.employee_id, e.email;
+    
+    PERFORM set_config('app.prevalidated', 'off', true);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Function: Write per-department daily snapshots for a date range
+-- Each day's end-of-day state is replayed from employee_audit_log; employees
+-- without status history fall back to their current status and last_updated.
+CREATE OR REPLACE FUNCTION refresh_department_snapshots(from_date DATE, to_date DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    affected INTEGER;
+BEGIN
+    INSERT INTO department_daily_snapshot (
+        snapshot_date, department_id, headcount, active_payroll, hires, resignations,
+        tenure_under_1y, tenure_1_3y, tenure_3_5y, tenure_over_5y
+    )
+    WITH days AS (
+        SELECT generate_series(from_date, to_date, INTERVAL '1 day')::DATE AS snapshot_date
+    ),
+    resignations AS (
+        SELECT 
+            e.employee_id,
+            e.department_id,
+            COALESCE(
+                (SELECT MAX(a.timestamp)::DATE
+                 FROM employee_audit_log a
+                 WHERE a.employee_id = e.employee_id
+                   AND a.action_type = 'UPDATE'
+                   AND a.new_status = 'resigned'
+                   AND a.old_status IS DISTINCT FROM 'resigned'),
+                e.last_updated::DATE
+            ) AS resigned_on
+        FROM employees e
+        WHERE e.status = 'resigned'
+    ),
+    employee_state AS (
+        SELECT 
+            d.snapshot_date,
+            e.department_id,
+            e.date_joined,
+            COALESCE(
+                prior_event.new_salary,
+                CASE WHEN next_event.action_type = 'INSERT' THEN next_event.new_salary ELSE next_event.old_salary END,
+                e.salary
+            ) AS salary,
+            COALESCE(
+                prior_event.new_status,
+                CASE WHEN next_event.action_type = 'INSERT' THEN next_event.new_status ELSE next_event.old_status END,
+                CASE WHEN r.resigned_on <= d.snapshot_date THEN 'resigned' ELSE 'active' END
+            ) AS status
+        FROM days d
+        JOIN employees e ON e.date_joined <= d.snapshot_date
+        LEFT JOIN resignations r ON r.employee_id = e.employee_id
+        LEFT JOIN LATERAL (
+            SELECT a.new_salary, a.new_status
+            FROM employee_audit_log a
+            WHERE a.employee_id = e.employee_id
+              AND a.action_type IN ('INSERT', 'UPDATE')
+              AND a.timestamp < d.snapshot_date + 1
+            ORDER BY a.timestamp DESC, a.log_id DESC
+            LIMIT 1
+        ) prior_event ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT a.action_type, a.old_salary, a.new_salary, a.old_status, a.new_status
+            FROM employee_audit_log a
+            WHERE a.employee_id = e.employee_id
+              AND a.action_type IN ('INSERT', 'UPDATE')
+              AND a.timestamp >= d.snapshot_date + 1
+            ORDER BY a.timestamp ASC, a.log_id ASC
+            LIMIT 1
+        ) next_event ON TRUE
+    ),
+    totals AS (
+        SELECT 
+            s.snapshot_date,
+            s.department_id,
+            COUNT(*) FILTER (WHERE s.status = 'active') AS headcount,
+            COALESCE(SUM(s.salary) FILTER (WHERE s.status = 'active'), 0) AS active_payroll,
+            COUNT(*) FILTER (WHERE s.date_joined = s.snapshot_date) AS hires,
+            COUNT(*) FILTER (WHERE s.status = 'active' AND s.snapshot_date - s.date_joined < 365) AS tenure_under_1y,
+            COUNT(*) FILTER (WHERE s.status = 'active' AND s.snapshot_date - s.date_joined >= 365
+                                                      AND s.snapshot_date - s.date_joined < 1095) AS tenure_1_3y,
+            COUNT(*) FILTER (WHERE s.status = 'active' AND s.snapshot_date - s.date_joined >= 1095
+                                                      AND s.snapshot_date - s.date_joined < 1825) AS tenure_3_5y,
+            COUNT(*) FILTER (WHERE s.status = 'active' AND s.snapshot_date - s.date_joined >= 1825) AS tenure_over_5y
+        FROM employee_state s
+        GROUP BY s.snapshot_date, s.department_id
+    ),
+    exits AS (
+        SELECT r.resigned_on AS snapshot_date, r.department_id, COUNT(*) AS resignations
+        FROM resignations r
+        WHERE r.resigned_on BETWEEN from_date AND to_date
+        GROUP BY r.resigned_on, r.department_id
+    )
+    SELECT 
+        d.snapshot_date,
+        dep.department_id,
+        COALESCE(t.headcount, 0),
+        COALESCE(t.active_payroll, 0),
+        COALESCE(t.hires, 0),
+        COALESCE(x.resignations, 0),
+        COALESCE(t.tenure_under_1y, 0),
+        COALESCE(t.tenure_1_3y, 0),
+        COALESCE(t.tenure_3_5y, 0),
+        COALESCE(t.tenure_over_5y, 0)
+    FROM days d
+    CROSS JOIN departments dep
+    LEFT JOIN totals t ON t.snapshot_date = d.snapshot_date AND t.department_id = dep.department_id
+    LEFT JOIN exits x ON x.snapshot_date = d.snapshot_date AND x.department_id = dep.department_id
+    ON CONFLICT (snapshot_date, department_id) DO UPDATE SET
+        headcount = EXCLUDED.headcount,
+        active_payroll = EXCLUDED.active_payroll,
+        hires = EXCLUDED.hires,
+        resignations = EXCLUDED.resignations,
+        tenure_under_1y = EXCLUDED.tenure_under_1y,
+        tenure_1_3y = EXCLUDED.tenure_1_3y,
+        tenure_3_5y = EXCLUDED.tenure_3_5y,
+        tenure_over_5y = EXCLUDED.tenure_over_5y;
+    
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql;
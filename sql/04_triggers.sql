@@ -12,6 +12,8 @@ BEGIN
             action_type, 
             old_salary, 
             new_salary, 
+            old_status, 
+            new_status, 
             timestamp
         )
         VALUES(
@@ -19,6 +21,8 @@ BEGIN
             'UPDATE', 
             OLD.salary, 
             NEW.salary, 
+            OLD.status, 
+            NEW.status, 
             NOW()
         );
     END IF;
@@ -31,7 +35,7 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Trigger: Log updates on employees table
-CREATE TRIGGER trg_employee_update
+CREATE OR REPLACE TRIGGER trg_employee_update
 AFTER UPDATE ON employees
 FOR EACH ROW 
 EXECUTE FUNCTION log_employee_update();
@@ -45,6 +49,8 @@ BEGIN
         action_type, 
         old_salary, 
         new_salary, 
+        old_status, 
+        new_status, 
         timestamp
     )
     VALUES(
@@ -52,6 +58,8 @@ BEGIN
         'INSERT', 
         NULL, 
         NEW.salary, 
+        NULL, 
+        NEW.status, 
         NOW()
     );
     
@@ -60,7 +68,7 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Trigger: Log inserts on employees table
-CREATE TRIGGER trg_employee_insert
+CREATE OR REPLACE TRIGGER trg_employee_insert
 AFTER INSERT ON employees
 FOR EACH ROW 
 EXECUTE FUNCTION log_employee_insert();
@@ -74,6 +82,8 @@ BEGIN
         action_type, 
         old_salary, 
         new_salary, 
+        old_status, 
+        new_status, 
         timestamp
     )
     VALUES(
@@ -81,6 +91,8 @@ BEGIN
         'DELETE', 
         OLD.salary, 
         NULL, 
+        OLD.status, 
+        NULL, 
         NOW()
     );
     
@@ -89,7 +101,7 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Trigger: Log deletes on employees table
-CREATE TRIGGER trg_employee_delete
+CREATE OR REPLACE TRIGGER trg_employee_delete
 AFTER DELETE ON employees
 FOR EACH ROW 
 EXECUTE FUNCTION log_employee_delete();
@@ -98,6 +110,11 @@ EXECUTE FUNCTION log_employee_delete();
 CREATE OR REPLACE FUNCTION format_employee_name()
 RETURNS TRIGGER AS $$
 BEGIN
+    -- Rows from bulk_insert_validated_employees were already normalized by the API
+    IF current_setting('app.prevalidated', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+    
     NEW.first_name = INITCAP(TRIM(NEW.first_name));
     NEW.last_name = INITCAP(TRIM(NEW.last_name));
     NEW.email = LOWER(TRIM(NEW.email));
@@ -106,13 +123,13 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Trigger: Format names before insert
-CREATE TRIGGER trg_name_format_insert
+CREATE OR REPLACE TRIGGER trg_name_format_insert
 BEFORE INSERT ON employees
 FOR EACH ROW 
 EXECUTE FUNCTION format_employee_name();
 
 -- Trigger: Format names before update
-CREATE TRIGGER trg_name_format_update
+CREATE OR REPLACE TRIGGER trg_name_format_update
 BEFORE UPDATE ON employees
 FOR EACH ROW 
 EXECUTE FUNCTION format_employee_name();
@@ -121,6 +138,11 @@ EXECUTE FUNCTION format_employee_name();
 CREATE OR REPLACE FUNCTION validate_employee_email()
 RETURNS TRIGGER AS $$
 BEGIN
+    -- Rows from bulk_insert_validated_employees were already validated by the API
+    IF current_setting('app.prevalidated', true) = 'on' THEN
+        RETURN NEW;
+    END IF;
+    
     IF NEW.email !~ '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$' THEN
         RAISE EXCEPTION 'Invalid email format: %', NEW.email;
     END IF;
@@ -129,13 +151,28 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Trigger: Validate email on insert and update
-CREATE TRIGGER trg_validate_email_insert
+CREATE OR REPLACE TRIGGER trg_validate_email_insert
 BEFORE INSERT ON employees
 FOR EACH ROW 
 EXECUTE FUNCTION validate_employee_email();
 
-CREATE TRIGGER trg_validate_email_update
+CREATE OR REPLACE TRIGGER trg_validate_email_update
 BEFORE UPDATE ON employees
 FOR EACH ROW 
 EXECUTE FUNCTION validate_employee_email();
 
+
+-- Trigger Function: Notify listeners that departments changed
+CREATE OR REPLACE FUNCTION notify_departments_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('departments_changed', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger: Invalidate in-process department registries on any change
+CREATE OR REPLACE TRIGGER trg_departments_changed
+AFTER INSERT OR UPDATE OR DELETE ON departments
+FOR EACH STATEMENT 
+EXECUTE FUNCTION notify_departments_changed();
@@ -0,0 +1,13 @@
+-- Employee Analytics Platform - Schema Version
+-- Records which schema revision the SQL files above produced.
+-- On startup the API upgrades databases recorded at an older version with
+-- sql/migrations and these files (keep in sync with SCHEMA_VERSION in
+-- backend/database.py; changes to existing tables need a numbered migration).
+
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_version (version) VALUES (8)
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,5 @@
+-- Version 2: the audit log records status changes, which
+-- refresh_department_snapshots replays. Databases created before version 2
+-- have employee_audit_log without these columns.
+ALTER TABLE employee_audit_log ADD COLUMN IF NOT EXISTS old_status VARCHAR(20);
+ALTER TABLE employee_audit_log ADD COLUMN IF NOT EXISTS new_status VARCHAR(20);
@@ -0,0 +1,11 @@
+-- Version 5: scheduled job runs are claimed per cron tick. A run is
+-- inserted as 'running' for (job_name, scheduled_for) before the job starts,
+-- so a tick already handled by another worker or replica is not run again.
+ALTER TABLE scheduled_job_runs ADD COLUMN IF NOT EXISTS scheduled_for TIMESTAMP;
+
+ALTER TABLE scheduled_job_runs DROP CONSTRAINT IF EXISTS scheduled_job_runs_status_check;
+ALTER TABLE scheduled_job_runs DROP CONSTRAINT IF EXISTS check_job_status_valid;
+ALTER TABLE scheduled_job_runs ADD CONSTRAINT scheduled_job_runs_status_check
+    CHECK (status IN ('running', 'success', 'failed'));
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_job_runs_tick ON scheduled_job_runs(job_name, scheduled_for);